@@ -3,6 +3,7 @@ import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config, pool
+from sqlalchemy.engine import make_url
 from alembic import context
 
 # --- Add backend folder to sys.path ---
@@ -12,6 +13,7 @@ sys.path.append(BASE_DIR)
 # Import models + Base
 from app.db import Base
 import app.models  # ensure models are imported so metadata is populated
+from app.archive import PARTITION_NAME
 
 # Alembic config
 config = context.config
@@ -29,12 +31,27 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_name(name, type_, parent_names):
+    # Monthly partitions of messages come and go with app.archive, not with the models
+    return not (type_ == "table" and PARTITION_NAME.match(name))
+
+
+def include_object_for(dialect_name):
+    def include_object(object, name, type_, reflected, compare_to):
+        # On Postgres messages is partitioned, keyed (id, timestamp), and
+        # migrated by hand; the model describes the SQLite layout
+        return not (dialect_name == "postgresql" and type_ == "table" and name == "messages")
+    return include_object
+
+
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        include_name=include_name,
+        include_object=include_object_for(make_url(url).get_backend_name()),
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -53,6 +70,8 @@ def run_migrations_online() -> None:
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
+            include_name=include_name,
+            include_object=include_object_for(connection.dialect.name),
         )
 
         with context.begin_transaction():
@@ -20,13 +20,21 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     """Upgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
+    op.create_table('escrows',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('request_id', sa.Integer(), nullable=False),
+    sa.Column('amount_inr', sa.Float(), nullable=False),
+    sa.Column('provider_payment_id', sa.String(), nullable=False),
+    sa.Column('status', sa.Enum('pending', 'paid', 'released', 'refunded', name='escrowstatus'), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['request_id'], ['requests.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_escrows_id'), 'escrows', ['id'], unique=False)
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
+    op.drop_index(op.f('ix_escrows_id'), table_name='escrows')
+    op.drop_table('escrows')
+    sa.Enum(name='escrowstatus').drop(op.get_bind(), checkfirst=True)
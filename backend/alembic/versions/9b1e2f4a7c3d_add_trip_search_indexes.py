@@ -0,0 +1,44 @@
+"""add trip search indexes
+
+Revision ID: 9b1e2f4a7c3d
+Revises: 4c73b5945beb
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1e2f4a7c3d'
+down_revision: Union[str, Sequence[str], None] = '4c73b5945beb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build concurrently so a large trips table stays writable meanwhile.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_trips_origin_destination_travel_date',
+            'trips',
+            ['origin', 'destination', 'travel_date'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_trips_travel_date_id',
+            'trips',
+            ['travel_date', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_trips_travel_date_id', table_name='trips', postgresql_concurrently=True)
+        op.drop_index('ix_trips_origin_destination_travel_date', table_name='trips', postgresql_concurrently=True)
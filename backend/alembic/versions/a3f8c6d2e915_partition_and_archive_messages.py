@@ -0,0 +1,162 @@
+"""partition and archive messages
+
+Revision ID: a3f8c6d2e915
+Revises: e9c3b5a1d742
+Create Date: 2026-10-19 16:12:48.530917
+
+"""
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f8c6d2e915'
+down_revision: Union[str, Sequence[str], None] = 'e9c3b5a1d742'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNREAD = sa.text('read_at IS NULL')
+# Later months are created by app.archive.maintain_partitions
+PARTITIONS_AHEAD = 3
+
+COLUMNS = 'id, request_id, sender_id, receiver_id, content, "timestamp", read_at'
+
+
+def month_start(value, months=0):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def message_columns(timestamp_nullable):
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('messages_id_seq')"), nullable=False),
+        sa.Column('request_id', sa.Integer(), nullable=False),
+        sa.Column('sender_id', sa.Integer(), nullable=False),
+        sa.Column('receiver_id', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=timestamp_nullable),
+        sa.Column('read_at', sa.DateTime(timezone=True), nullable=True),
+        # Named, so Postgres does not pick messages_*_fkey1 while the old table still holds the defaults
+        sa.ForeignKeyConstraint(['receiver_id'], ['users.id'], name='messages_receiver_id_fkey', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['request_id'], ['requests.id'], name='messages_request_id_fkey', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['sender_id'], ['users.id'], name='messages_sender_id_fkey', ondelete='CASCADE'),
+    ]
+
+
+def set_aside_messages(old_name):
+    """Rename messages out of the way, freeing its index names and sequence for the new table."""
+    op.rename_table('messages', old_name)
+    op.execute(f'ALTER TABLE {old_name} RENAME CONSTRAINT messages_pkey TO {old_name}_pkey')
+    op.drop_index('ix_messages_request_id_timestamp_id', table_name=old_name)
+    op.drop_index('ix_messages_unread', table_name=old_name)
+    op.execute('ALTER SEQUENCE messages_id_seq OWNED BY NONE')
+
+
+def create_message_indexes():
+    op.create_index('ix_messages_request_id_timestamp_id', 'messages', ['request_id', 'timestamp', 'id'], unique=False)
+    op.create_index(
+        'ix_messages_unread', 'messages', ['receiver_id', 'request_id'], unique=False,
+        postgresql_where=UNREAD, sqlite_where=UNREAD,
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    op.create_table('message_archives',
+    sa.Column('request_id', sa.Integer(), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.Column('first_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['request_id'], ['requests.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('request_id')
+    )
+    op.execute('UPDATE messages SET "timestamp" = CURRENT_TIMESTAMP WHERE "timestamp" IS NULL')
+
+    if bind.dialect.name != 'postgresql':
+        # ix_messages_id only duplicated the primary key
+        op.drop_index(op.f('ix_messages_id'), table_name='messages')
+        with op.batch_alter_table('messages') as batch_op:
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(timezone=True), nullable=False)
+        return
+
+    # Postgres: rebuild messages as monthly range partitions on timestamp. The
+    # primary key has to include the partition key, hence (id, timestamp).
+    # Rows are copied inside the migration's transaction; on a large table
+    # plan for a maintenance window.
+    op.drop_index(op.f('ix_messages_id'), table_name='messages')
+    set_aside_messages('messages_unpartitioned')
+    op.create_table('messages',
+    *message_columns(timestamp_nullable=False),
+    sa.PrimaryKeyConstraint('id', 'timestamp'),
+    postgresql_partition_by='RANGE ("timestamp")'
+    )
+    now = datetime.now(timezone.utc)
+    oldest = bind.scalar(sa.text('SELECT min("timestamp") FROM messages_unpartitioned')) or now
+    start, last = month_start(oldest.astimezone(timezone.utc)), month_start(now, PARTITIONS_AHEAD)
+    while start <= last:
+        end = month_start(start, 1)
+        op.execute(
+            f"CREATE TABLE messages_{start:%Y_%m} PARTITION OF messages "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+    op.execute('CREATE TABLE messages_default PARTITION OF messages DEFAULT')
+    op.execute(f'INSERT INTO messages ({COLUMNS}) SELECT {COLUMNS} FROM messages_unpartitioned')
+    op.drop_table('messages_unpartitioned')
+    op.execute('ALTER SEQUENCE messages_id_seq OWNED BY messages.id')
+    create_message_indexes()
+
+
+def restore_archives(bind):
+    """Put archived conversations back into messages."""
+    messages = sa.table(
+        'messages',
+        sa.column('id', sa.Integer()), sa.column('request_id', sa.Integer()),
+        sa.column('sender_id', sa.Integer()), sa.column('receiver_id', sa.Integer()),
+        sa.column('content', sa.Text()), sa.column('timestamp', sa.DateTime(timezone=True)),
+        sa.column('read_at', sa.DateTime(timezone=True)),
+    )
+    for request_id, data in bind.execute(sa.text('SELECT request_id, data FROM message_archives')).all():
+        rows = [
+            {
+                'id': id, 'request_id': request_id, 'sender_id': sender_id, 'receiver_id': receiver_id,
+                'content': content, 'timestamp': datetime.fromisoformat(timestamp),
+                'read_at': datetime.fromisoformat(read_at) if read_at else None,
+            }
+            for id, sender_id, receiver_id, content, timestamp, read_at in json.loads(zlib.decompress(data))
+        ]
+        op.bulk_insert(messages, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    restore_archives(bind)
+    op.drop_table('message_archives')
+
+    if bind.dialect.name != 'postgresql':
+        with op.batch_alter_table('messages') as batch_op:
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(timezone=True), nullable=True)
+        op.create_index(op.f('ix_messages_id'), 'messages', ['id'], unique=False)
+        return
+
+    set_aside_messages('messages_partitioned')
+    op.create_table('messages',
+    *message_columns(timestamp_nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(f'INSERT INTO messages ({COLUMNS}) SELECT {COLUMNS} FROM messages_partitioned')
+    # Takes the monthly partitions with it
+    op.drop_table('messages_partitioned')
+    op.execute('ALTER SEQUENCE messages_id_seq OWNED BY messages.id')
+    op.create_index(op.f('ix_messages_id'), 'messages', ['id'], unique=False)
+    create_message_indexes()
@@ -0,0 +1,53 @@
+"""add jobs and failed escrow status
+
+Revision ID: a84c2e6f1b93
+Revises: f3b6d0c29a41
+Create Date: 2026-10-18 16:20:44.903157
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a84c2e6f1b93'
+down_revision: Union[str, Sequence[str], None] = 'f3b6d0c29a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+job_status = sa.Enum('queued', 'running', 'done', 'failed', name='jobstatus')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        # ADD VALUE cannot run inside a transaction block before Postgres 12
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE escrowstatus ADD VALUE IF NOT EXISTS 'failed'")
+
+    op.create_index(op.f('ix_escrows_provider_payment_id'), 'escrows', ['provider_payment_id'], unique=False)
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('status', job_status, nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_status_run_at', 'jobs', ['status', 'run_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_status_run_at', table_name='jobs')
+    op.drop_table('jobs')
+    job_status.drop(op.get_bind(), checkfirst=True)
+    op.drop_index(op.f('ix_escrows_provider_payment_id'), table_name='escrows')
+    # Postgres cannot drop an enum value; 'failed' stays on escrowstatus
@@ -0,0 +1,53 @@
+"""add search indexes
+
+Revision ID: b5e9a3d7c210
+Revises: a84c2e6f1b93
+Create Date: 2026-10-18 17:35:12.661848
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e9a3d7c210'
+down_revision: Union[str, Sequence[str], None] = 'a84c2e6f1b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Expressions must match app/search.py exactly for the planner to use them
+INDEXES = [
+    ('ix_trips_search_document', 'trips', "to_tsvector('simple', origin || ' ' || destination)", None),
+    ('ix_trips_origin_trgm', 'trips', 'lower(origin)', 'gin_trgm_ops'),
+    ('ix_trips_destination_trgm', 'trips', 'lower(destination)', 'gin_trgm_ops'),
+    (
+        'ix_requests_search_document',
+        'requests',
+        "to_tsvector('simple', product_name || ' ' || coalesce(product_description, ''))",
+        None,
+    ),
+    ('ix_requests_product_name_trgm', 'requests', 'lower(product_name)', 'gin_trgm_ops'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite runs use the in-process index in app/search.py instead
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Build concurrently so the tables stay writable meanwhile.
+    with op.get_context().autocommit_block():
+        for name, table, expression, opclass in INDEXES:
+            column = f'({expression}) {opclass}' if opclass else f'({expression})'
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ({column})')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for name, _, _, _ in reversed(INDEXES):
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
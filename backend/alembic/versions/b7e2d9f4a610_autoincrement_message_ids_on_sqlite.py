@@ -0,0 +1,52 @@
+"""autoincrement message ids on sqlite
+
+Revision ID: b7e2d9f4a610
+Revises: a3f8c6d2e915
+Create Date: 2026-10-20 11:04:37.218406
+
+"""
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d9f4a610'
+down_revision: Union[str, Sequence[str], None] = 'a3f8c6d2e915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def last_message_id(bind):
+    """The highest id handed out so far, counting conversations already archived."""
+    last = bind.scalar(sa.text('SELECT max(id) FROM messages')) or 0
+    for (data,) in bind.execute(sa.text('SELECT data FROM message_archives')):
+        last = max([last, *[row[0] for row in json.loads(zlib.decompress(data))]])
+    return last
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        # Postgres draws ids from messages_id_seq, which never goes back
+        return
+    # Without AUTOINCREMENT SQLite hands out max(id) + 1, so ids of archived
+    # (deleted) messages came round again
+    with op.batch_alter_table('messages', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+    last = last_message_id(bind)
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'messages'")
+    if last:
+        op.execute(sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES ('messages', :seq)").bindparams(seq=last))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('messages', recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+        pass
@@ -0,0 +1,35 @@
+"""add message cursor index
+
+Revision ID: c5d8a1e3f207
+Revises: 9b1e2f4a7c3d
+Create Date: 2026-10-18 11:03:27.540911
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d8a1e3f207'
+down_revision: Union[str, Sequence[str], None] = '9b1e2f4a7c3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_request_id_timestamp_id',
+            'messages',
+            ['request_id', 'timestamp', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_messages_request_id_timestamp_id', table_name='messages', postgresql_concurrently=True)
@@ -0,0 +1,56 @@
+"""add message read_at and dashboard indexes
+
+Revision ID: c7f1d4e8a962
+Revises: b5e9a3d7c210
+Create Date: 2026-10-18 21:48:05.127390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f1d4e8a962'
+down_revision: Union[str, Sequence[str], None] = 'b5e9a3d7c210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNREAD = sa.text('read_at IS NULL')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('messages', sa.Column('read_at', sa.DateTime(timezone=True), nullable=True))
+    # Build concurrently so the tables stay writable meanwhile.
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_trips_user_id'), 'trips', ['user_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_requests_trip_id'), 'requests', ['trip_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(
+            op.f('ix_requests_requester_id'), 'requests', ['requester_id'], unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            op.f('ix_escrows_request_id'), 'escrows', ['request_id'], unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_messages_unread',
+            'messages',
+            ['receiver_id', 'request_id'],
+            unique=False,
+            postgresql_where=UNREAD,
+            sqlite_where=UNREAD,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_messages_unread', table_name='messages', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_escrows_request_id'), table_name='escrows', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_requests_requester_id'), table_name='requests', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_requests_trip_id'), table_name='requests', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_trips_user_id'), table_name='trips', postgresql_concurrently=True)
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.drop_column('read_at')
@@ -0,0 +1,36 @@
+"""add rate limits
+
+Revision ID: d4a8e1f7c305
+Revises: c7f1d4e8a962
+Create Date: 2026-10-18 23:12:40.518273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8e1f7c305'
+down_revision: Union[str, Sequence[str], None] = 'c7f1d4e8a962'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Buckets are disposable, so skip the WAL on Postgres
+    prefixes = ['UNLOGGED'] if op.get_bind().dialect.name == 'postgresql' else []
+    op.create_table(
+        'rate_limits',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('tat', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+        prefixes=prefixes,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limits')
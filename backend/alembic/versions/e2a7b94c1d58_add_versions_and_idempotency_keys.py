@@ -0,0 +1,41 @@
+"""add versions and idempotency keys
+
+Revision ID: e2a7b94c1d58
+Revises: c5d8a1e3f207
+Create Date: 2026-10-18 13:41:09.276315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7b94c1d58'
+down_revision: Union[str, Sequence[str], None] = 'c5d8a1e3f207'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('requests', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('escrows', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.create_table('idempotency_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=False),
+    sa.Column('response_body', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'key', name='uq_idempotency_keys_scope_key')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('idempotency_keys')
+    op.drop_column('escrows', 'version')
+    op.drop_column('requests', 'version')
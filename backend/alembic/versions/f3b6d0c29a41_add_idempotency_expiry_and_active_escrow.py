@@ -0,0 +1,58 @@
+"""add idempotency expiry and active escrow constraint
+
+Revision ID: f3b6d0c29a41
+Revises: e2a7b94c1d58
+Create Date: 2026-10-18 15:02:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b6d0c29a41'
+down_revision: Union[str, Sequence[str], None] = 'e2a7b94c1d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE = sa.text("status IN ('pending', 'paid')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    # Keys written before this revision keep the default 24h window
+    op.add_column('idempotency_keys', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    if bind.dialect.name == 'postgresql':
+        op.execute("UPDATE idempotency_keys SET expires_at = created_at + interval '24 hours'")
+    else:
+        op.execute("UPDATE idempotency_keys SET expires_at = datetime(created_at, '+24 hours')")
+    with op.batch_alter_table('idempotency_keys') as batch_op:
+        batch_op.alter_column('expires_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index(op.f('ix_idempotency_keys_expires_at'), 'idempotency_keys', ['expires_at'], unique=False)
+
+    # Duplicates have to be resolved by hand; refuse rather than guess which payment is real
+    duplicates = bind.execute(sa.text(
+        "SELECT request_id FROM escrows WHERE status IN ('pending', 'paid') "
+        "GROUP BY request_id HAVING COUNT(*) > 1"
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            f"requests with more than one active escrow: {sorted(duplicates)}; "
+            "refund or release the extras before upgrading"
+        )
+    op.create_index(
+        'uq_escrows_active_request', 'escrows', ['request_id'], unique=True,
+        postgresql_where=ACTIVE, sqlite_where=ACTIVE,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_escrows_active_request', table_name='escrows')
+    op.drop_index(op.f('ix_idempotency_keys_expires_at'), table_name='idempotency_keys')
+    with op.batch_alter_table('idempotency_keys') as batch_op:
+        batch_op.drop_column('expires_at')
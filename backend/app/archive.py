@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import zlib
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import db, jobs, models, outbox, schemas
+
+logger = logging.getLogger(__name__)
+
+# A closed request's conversation stays in messages this long before it is archived
+ARCHIVE_AFTER = timedelta(days=float(os.getenv("MESSAGE_ARCHIVE_AFTER_DAYS", "7")))
+COMPRESS_LEVEL = int(os.getenv("MESSAGE_ARCHIVE_COMPRESS_LEVEL", "6"))
+# Monthly partitions of messages kept ready beyond the current month (Postgres)
+PARTITIONS_AHEAD = int(os.getenv("MESSAGE_PARTITIONS_AHEAD", "3"))
+MAINTENANCE_INTERVAL = float(os.getenv("MESSAGE_MAINTENANCE_INTERVAL", "3600"))
+# pg_try_advisory_xact_lock key, so only one worker at a time runs the partition DDL
+MAINTENANCE_LOCK_ID = 0x6D736770
+
+# messages_2026_10 and friends, plus messages_default for anything out of range
+PARTITION_NAME = re.compile(r"^messages_(\d{4}_\d{2}|default)$")
+
+# Archived rows carry the MessageResponse fields, so list endpoints can mix them with hot ones
+ArchivedMessage = namedtuple("ArchivedMessage", [*schemas.MessageResponse.model_fields, "read_at"])
+
+
+def is_closed():
+    """Requests whose conversation is over: rejected, or their escrow paid out either way."""
+    settled = select(models.Escrow.request_id).where(
+        models.Escrow.status.in_([models.EscrowStatus.released, models.EscrowStatus.refunded])
+    )
+    return or_(models.Request.status == models.RequestStatus.rejected, models.Request.id.in_(settled))
+
+
+# -----------------------------
+# Archive format
+# -----------------------------
+def pack(messages: list[ArchivedMessage]) -> bytes:
+    rows = [
+        [m.id, m.sender_id, m.receiver_id, m.content, m.timestamp.isoformat(),
+         m.read_at.isoformat() if m.read_at else None]
+        for m in messages
+    ]
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), COMPRESS_LEVEL)
+
+
+def unpack(request_id: int, data: bytes) -> list[ArchivedMessage]:
+    return [
+        ArchivedMessage(
+            id, request_id, sender_id, receiver_id, content, datetime.fromisoformat(timestamp),
+            datetime.fromisoformat(read_at) if read_at else None,
+        )
+        for id, sender_id, receiver_id, content, timestamp, read_at in json.loads(zlib.decompress(data))
+    ]
+
+
+async def load_messages(session: AsyncSession, request_id: int) -> list[ArchivedMessage]:
+    """A request's archived messages in (timestamp, id) order; [] when it has none."""
+    data = await session.scalar(
+        select(models.MessageArchive.data).where(models.MessageArchive.request_id == request_id)
+    )
+    return unpack(request_id, data) if data else []
+
+
+# -----------------------------
+# Archiving
+# -----------------------------
+async def archive_conversation(session: AsyncSession, request_id: int) -> int:
+    """Move the request's messages into its archive row; the caller commits."""
+    rows = (await session.execute(
+        select(*[getattr(models.Message, field) for field in ArchivedMessage._fields])
+        .where(models.Message.request_id == request_id)
+        .with_for_update()
+    )).all()
+    if not rows:
+        return 0
+    archive = await session.get(models.MessageArchive, request_id, with_for_update=True)
+    # Timestamps round-trip as the database returned them, so they compare with hot rows and cursors
+    messages = [ArchivedMessage._make(row) for row in rows]
+    if archive is None:
+        archive = models.MessageArchive(request_id=request_id)
+        session.add(archive)
+    else:
+        # Stragglers sent after an earlier run join what is already there
+        messages += await load_messages(session, request_id)
+    messages.sort(key=lambda m: (m.timestamp, m.id))
+    archive.message_count = len(messages)
+    archive.first_at = messages[0].timestamp
+    archive.last_at = messages[-1].timestamp
+    archive.archived_at = datetime.now(timezone.utc)
+    archive.data = pack(messages)
+    await session.execute(
+        delete(models.Message).where(
+            models.Message.request_id == request_id, models.Message.id.in_([row.id for row in rows])
+        )
+    )
+    return len(rows)
+
+
+@jobs.handler("messages.archive")
+async def archive_messages(session: AsyncSession, payload: dict):
+    request_id = payload["request_id"]
+    if await session.scalar(select(models.Request.id).where(models.Request.id == request_id, is_closed())) is None:
+        return
+    moved = await archive_conversation(session, request_id)
+    logger.info("archived %d messages of request %d", moved, request_id)
+
+
+@outbox.subscriber("request.rejected", "escrow.released", "escrow.refunded")
+async def schedule_archive(session: AsyncSession, event: dict):
+    # Leave both sides time to wrap up before the conversation leaves the hot table
+    jobs.enqueue(
+        session, "messages.archive", {"request_id": event["payload"]["request_id"]},
+        delay=ARCHIVE_AFTER.total_seconds(),
+    )
+
+
+async def backfill() -> int:
+    """Queue archiving for closed requests that went quiet before the subscriber existed."""
+    cutoff = datetime.now(timezone.utc) - ARCHIVE_AFTER
+    quiet = (
+        select(models.Message.request_id)
+        .group_by(models.Message.request_id)
+        .having(func.max(models.Message.timestamp) < cutoff)
+    )
+    async with db.AsyncSessionLocal() as session:
+        request_ids = (await session.scalars(
+            select(models.Request.id).where(models.Request.id.in_(quiet), is_closed())
+        )).all()
+        for request_id in request_ids:
+            jobs.enqueue(session, "messages.archive", {"request_id": request_id})
+        await session.commit()
+    return len(request_ids)
+
+
+# -----------------------------
+# Partitions (Postgres)
+# -----------------------------
+def month_start(value: datetime, months: int = 0) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(start: datetime) -> str:
+    return f"messages_{start:%Y_%m}"
+
+
+async def maintain_partitions(now: datetime | None = None) -> dict:
+    """Create the coming months' partitions and drop past ones that archiving emptied."""
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    created, dropped = [], []
+    async with db.async_engine.begin() as conn:
+        if conn.dialect.name != "postgresql":
+            return {"created": created, "dropped": dropped}
+        if not await conn.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_ID}):
+            return {"created": created, "dropped": dropped}
+        # Both DDLs lock the parent table; give up rather than queue every insert behind us
+        await conn.execute(text("SET LOCAL lock_timeout = '2s'"))
+        existing = set((await conn.scalars(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass('messages')"
+        ))).all())
+        for offset in range(PARTITIONS_AHEAD + 1):
+            start = month_start(now, offset)
+            name = partition_name(start)
+            if existing and name not in existing:
+                await conn.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF messages "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{month_start(start, 1).isoformat()}')"
+                ))
+                created.append(name)
+        current = partition_name(month_start(now))
+        for name in sorted(existing):
+            # Timestamps are written at send time, so a past month only ever shrinks
+            if name == "messages_default" or not PARTITION_NAME.match(name) or name >= current:
+                continue
+            if not await conn.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {name})")):
+                await conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+    if created or dropped:
+        logger.info("messages partitions: created %s, dropped %s", created, dropped)
+    return {"created": created, "dropped": dropped}
+
+
+async def maintain_forever(interval: float = MAINTENANCE_INTERVAL):
+    """Run by the dedicated worker (python -m app.jobs), never by the API processes."""
+    while True:
+        try:
+            await maintain_partitions()
+        except Exception:
+            logger.exception("messages partition maintenance failed")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    print(asyncio.run(backfill()))
@@ -1,8 +1,12 @@
+import os
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 from app import db, models
+from app.cache import TTLCache
 # from app.security import SECRET_KEY, ALGORITHM  # reuse your secret
 from datetime import datetime, timedelta
 
@@ -15,7 +19,36 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(db.get_db)):
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user, as handed to route handlers."""
+    id: int
+    username: str
+
+
+# token subject -> Principal, so authenticated calls skip the users lookup
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "60")),
+)
+
+
+def invalidate_user(username: str):
+    principal_cache.pop(username)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _user_changed(mapper, connection, target):
+    invalidate_user(target.username)
+    # a rename leaves the old subject cached too
+    history = inspect(target).attrs.username.history
+    for old_username in history.deleted or ():
+        invalidate_user(old_username)
+
+
+async def authenticate(token: str, session: AsyncSession) -> Principal:
+    """Resolve a bearer token to its Principal, raising 401 when it is not valid."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -29,10 +62,32 @@ def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Dep
     except JWTError:
         raise credentials_exception
 
-    user = session.query(models.User).filter(models.User.username == username).first()
-    if user is None:
+    principal = principal_cache.get(username)
+    if principal is not None:
+        return principal
+
+    row = (await session.execute(
+        select(models.User.id, models.User.username).where(models.User.username == username)
+    )).first()
+    if row is None:
         raise credentials_exception
-    return user.username  # or return the full `user` object if needed
+    principal = Principal(id=row.id, username=row.username)
+    principal_cache.set(username, principal)
+    return principal
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(db.get_db)):
+    return await authenticate(token, session)
+
+
+# Comma-separated usernames allowed on /admin routes
+ADMIN_USERNAMES = {name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()}
+
+
+async def get_admin_user(user: Principal = Depends(get_current_user)):
+    if user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
 
 
 def create_access_token(data: dict):
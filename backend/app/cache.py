@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries also expire `ttl` seconds after being set."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheBackend:
+    """Storage behind ResponseCache.
+
+    Async so a shared store (Redis, memcached) can implement it for
+    multi-worker deployments without blocking the event loop.
+    """
+
+    async def get(self, key):
+        raise NotImplementedError
+
+    async def set(self, key, value, ttl: float | None = None):
+        raise NotImplementedError
+
+    async def delete(self, *keys):
+        raise NotImplementedError
+
+
+class LocalCacheBackend(CacheBackend):
+    """Per-process LRU + TTL store; other workers see writes after at most `ttl`."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 30.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key):
+        return self._cache.get(key)
+
+    async def set(self, key, value, ttl: float | None = None):
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._cache.pop(key)
+
+
+class ResponseCache:
+    """Serialized responses keyed "<resource>:<id>", with hit/miss counts per resource."""
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = {}
+        self.misses = {}
+
+    async def get(self, key):
+        if not self.enabled:
+            return None
+        value = await self.backend.get(key)
+        counts = self.misses if value is None else self.hits
+        resource = key.split(":", 1)[0]
+        counts[resource] = counts.get(resource, 0) + 1
+        return value
+
+    async def set(self, key, value):
+        if self.enabled:
+            await self.backend.set(key, value)
+
+    async def invalidate(self, *keys):
+        if self.enabled:
+            await self.backend.delete(*keys)
+
+    def stats(self) -> dict:
+        resources = sorted(set(self.hits) | set(self.misses))
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "resources": {
+                name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                for name in resources
+            },
+        }
+
+
+response_cache = ResponseCache(
+    LocalCacheBackend(
+        maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "10000")),
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL", "30")),
+    ),
+    enabled=os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1",
+)
+
+
+def trip_key(trip_id: int) -> str:
+    return f"trip:{trip_id}"
+
+
+def trip_requests_key(trip_id: int) -> str:
+    return f"trip_requests:{trip_id}"
@@ -0,0 +1,149 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from app import auth, db, models, querycount, schemas
+
+router = APIRouter(prefix="/admin/export", tags=["Admin"], dependencies=[Depends(auth.get_admin_user)])
+
+# Rows pulled per server-side cursor fetch; memory stays at one batch
+BATCH_SIZE = 1000
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def _rows(stmt):
+    # The session lives inside the generator: request-scoped dependencies
+    # are closed before a streaming body is sent.
+    async with db.AsyncSessionLocal() as session:
+        result = await session.stream(stmt.execution_options(yield_per=BATCH_SIZE))
+        async for partition in result.partitions():
+            yield partition
+
+
+async def _ndjson(stmt):
+    async for partition in _rows(stmt):
+        yield "".join(
+            json.dumps({key: _plain(value) for key, value in row._mapping.items()}) + "\n"
+            for row in partition
+        )
+
+
+async def _csv(stmt):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in stmt.selected_columns])
+    async for partition in _rows(stmt):
+        writer.writerows([_plain(value) for value in row] for row in partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_export(stmt, name: str, fmt: str) -> StreamingResponse:
+    body = _ndjson(stmt) if fmt == "ndjson" else _csv(stmt)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+def parse_status(status, enum_cls):
+    if status is None:
+        return None
+    try:
+        return enum_cls(status)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Unknown status {status!r}")
+
+
+FORMAT = Query("ndjson", pattern="^(ndjson|csv)$")
+
+
+@router.get("/trips")
+@querycount.budget(2)
+async def export_trips(
+    format: str = FORMAT,
+    date_from: schemas.NaiveUTCDatetime | None = None,
+    date_to: schemas.NaiveUTCDatetime | None = None,
+):
+    stmt = select(
+        models.Trip.id, models.Trip.user_id, models.Trip.origin,
+        models.Trip.destination, models.Trip.travel_date,
+    )
+    if date_from:
+        stmt = stmt.where(models.Trip.travel_date >= date_from)
+    if date_to:
+        stmt = stmt.where(models.Trip.travel_date <= date_to)
+    return stream_export(stmt.order_by(models.Trip.id), "trips", format)
+
+
+@router.get("/requests")
+@querycount.budget(2)
+async def export_requests(
+    format: str = FORMAT,
+    date_from: schemas.NaiveUTCDatetime | None = None,
+    date_to: schemas.NaiveUTCDatetime | None = None,
+    status: str | None = None,
+):
+    """Requests with their trip; the date range applies to the trip's travel date."""
+    stmt = (
+        select(
+            models.Request.id, models.Request.trip_id, models.Request.requester_id,
+            models.Request.product_name, models.Request.product_description, models.Request.status,
+            models.Trip.user_id.label("traveler_id"), models.Trip.travel_date,
+        )
+        .join(models.Trip, models.Request.trip_id == models.Trip.id)
+    )
+    status = parse_status(status, models.RequestStatus)
+    if status:
+        stmt = stmt.where(models.Request.status == status)
+    if date_from:
+        stmt = stmt.where(models.Trip.travel_date >= date_from)
+    if date_to:
+        stmt = stmt.where(models.Trip.travel_date <= date_to)
+    return stream_export(stmt.order_by(models.Request.id), "requests", format)
+
+
+@router.get("/escrows")
+@querycount.budget(2)
+async def export_escrows(
+    format: str = FORMAT,
+    date_from: schemas.NaiveUTCDatetime | None = None,
+    date_to: schemas.NaiveUTCDatetime | None = None,
+    status: str | None = None,
+):
+    """Escrows joined with their request and trip, for reconciliation; dates filter created_at."""
+    stmt = (
+        select(
+            models.Escrow.id, models.Escrow.request_id, models.Escrow.amount_inr,
+            models.Escrow.provider_payment_id, models.Escrow.status, models.Escrow.created_at,
+            models.Request.status.label("request_status"), models.Request.requester_id,
+            models.Request.trip_id, models.Trip.user_id.label("traveler_id"), models.Trip.travel_date,
+        )
+        .join(models.Request, models.Escrow.request_id == models.Request.id)
+        .join(models.Trip, models.Request.trip_id == models.Trip.id)
+    )
+    status = parse_status(status, models.EscrowStatus)
+    if status:
+        stmt = stmt.where(models.Escrow.status == status)
+    if date_from:
+        stmt = stmt.where(models.Escrow.created_at >= date_from)
+    if date_to:
+        stmt = stmt.where(models.Escrow.created_at <= date_to)
+    return stream_export(stmt.order_by(models.Escrow.id), "escrows", format)
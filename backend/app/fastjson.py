@@ -0,0 +1,52 @@
+import enum
+import json
+from datetime import datetime
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib path writes the same bytes, only slower
+    orjson = None
+
+
+# List endpoints select plain column tuples and encode them here instead of
+# validating one response model per row. The bytes match what FastAPI sends
+# for the same data through response_model + JSONResponse.
+def columns(model, schema: type[BaseModel]) -> list:
+    """The model's columns for each field of `schema`, in the order pydantic writes them."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def items(rows, schema: type[BaseModel]) -> list[dict]:
+    names = list(schema.model_fields)
+    return [dict(zip(names, row)) for row in rows]
+
+
+def _default(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        # pydantic writes UTC as "Z"
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON body from dumps(); already encoded bytes (e.g. from the cache) pass through."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, db
+
+logger = logging.getLogger(__name__)
+
+# Keys are honoured for this long; expired rows are ignored, then swept
+KEY_TTL = timedelta(hours=float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24")))
+SWEEP_INTERVAL = float(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL", "300"))
+SWEEP_BATCH_SIZE = int(os.getenv("IDEMPOTENCY_SWEEP_BATCH_SIZE", "1000"))
+
+
+async def _stored(session: AsyncSession, scope: str, key: str):
+    record = await session.scalar(
+        select(models.IdempotencyKey).where(
+            models.IdempotencyKey.scope == scope, models.IdempotencyKey.key == key
+        )
+    )
+    if record is None:
+        return None
+    if record.expires_at <= datetime.utcnow():
+        # Free the (scope, key) slot now rather than waiting for the sweeper
+        await session.delete(record)
+        await session.flush()
+        return None
+    return JSONResponse(
+        json.loads(record.response_body),
+        status_code=record.status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+async def run(session: AsyncSession, scope: str, key: str | None, action, on_commit=None, status_code: int = 200):
+    """Run `action` once per (scope, key) and commit.
+
+    `action` makes its changes without committing and returns the JSON body.
+    The body is stored in the same transaction as those changes, so a replay
+    either finds the stored response or the change never happened. Without a
+    key it just runs and commits. `on_commit(body)` runs after a real commit.
+    An IntegrityError that is not explained by a stored response is re-raised.
+    """
+    if key:
+        replay = await _stored(session, scope, key)
+        if replay is not None:
+            return replay
+
+    try:
+        body = await action()
+        if key:
+            session.add(models.IdempotencyKey(
+                scope=scope,
+                key=key,
+                status_code=status_code,
+                response_body=json.dumps(body),
+                expires_at=datetime.utcnow() + KEY_TTL,
+            ))
+        await session.commit()
+    except IntegrityError:
+        if not key:
+            raise
+        # A concurrent retry with the same key committed first
+        await session.rollback()
+        replay = await _stored(session, scope, key)
+        if replay is None:
+            raise
+        return replay
+
+    if on_commit is not None:
+        await on_commit(body)
+    return body
+
+
+# -----------------------------
+# Sweeper
+# -----------------------------
+async def purge_expired(batch_size: int = SWEEP_BATCH_SIZE) -> int:
+    """Delete expired keys in batches so no single statement holds locks for long."""
+    purged = 0
+    while True:
+        async with db.AsyncSessionLocal() as session:
+            expired = (
+                select(models.IdempotencyKey.id)
+                .where(models.IdempotencyKey.expires_at <= datetime.utcnow())
+                .limit(batch_size)
+            )
+            result = await session.execute(
+                delete(models.IdempotencyKey).where(models.IdempotencyKey.id.in_(expired))
+            )
+            await session.commit()
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
+
+
+async def sweep_forever(interval: float = SWEEP_INTERVAL):
+    while True:
+        try:
+            purged = await purge_expired()
+            if purged:
+                logger.info("purged %d expired idempotency keys", purged)
+        except Exception:
+            logger.exception("idempotency key sweep failed")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    print(asyncio.run(purge_expired()))
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import db, models
+
+logger = logging.getLogger(__name__)
+
+# Drain the queue (and the outbox) inside each API worker too; set to 0 when running `python -m app.jobs`
+IN_APP = os.getenv("JOB_WORKER_IN_APP", "1") == "1"
+POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "10"))
+BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "2"))
+BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "300"))
+# A running job older than this belongs to a dead worker and is claimed again
+LOCK_TIMEOUT = timedelta(seconds=float(os.getenv("JOB_LOCK_TIMEOUT", "300")))
+
+# kind -> async handler(session, payload); handlers must not commit
+HANDLERS = {}
+
+
+def handler(kind: str):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(session: AsyncSession, kind: str, payload: dict, delay: float = 0, max_attempts: int = 5):
+    """Add a job to the caller's transaction; it becomes visible when they commit."""
+    job = models.Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+        max_attempts=max_attempts,
+    )
+    session.add(job)
+    return job
+
+
+def backoff(attempts: int) -> float:
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * (0.5 + random.random() / 2)
+
+
+# -----------------------------
+# Claiming and running
+# -----------------------------
+async def claim(limit: int = BATCH_SIZE) -> list[int]:
+    now = datetime.utcnow()
+    async with db.AsyncSessionLocal() as session:
+        due = (
+            select(models.Job)
+            .where(or_(
+                and_(models.Job.status == models.JobStatus.queued, models.Job.run_at <= now),
+                and_(models.Job.status == models.JobStatus.running, models.Job.locked_at <= now - LOCK_TIMEOUT),
+            ))
+            .order_by(models.Job.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        jobs = (await session.scalars(due)).all()
+        for job in jobs:
+            job.status = models.JobStatus.running
+            job.locked_at = now
+            job.attempts += 1
+        await session.commit()
+        return [job.id for job in jobs]
+
+
+async def execute(job_id: int):
+    async with db.AsyncSessionLocal() as session:
+        job = await session.get(models.Job, job_id)
+        try:
+            fn = HANDLERS.get(job.kind)
+            if fn is None:
+                raise LookupError(f"no handler registered for {job.kind!r}")
+            await fn(session, json.loads(job.payload))
+            job.status = models.JobStatus.done
+            job.locked_at = None
+            await session.commit()
+            return
+        except Exception as exc:
+            await session.rollback()
+            error = f"{type(exc).__name__}: {exc}"
+
+        job = await session.get(models.Job, job_id)
+        job.last_error = error
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = models.JobStatus.failed
+            logger.error("job %s (%s) failed permanently: %s", job.id, job.kind, error)
+        else:
+            job.status = models.JobStatus.queued
+            job.run_at = datetime.utcnow() + timedelta(seconds=backoff(job.attempts))
+            logger.warning("job %s (%s) attempt %s failed: %s", job.id, job.kind, job.attempts, error)
+        await session.commit()
+
+
+async def run_pending(limit: int = BATCH_SIZE) -> int:
+    job_ids = await claim(limit)
+    for job_id in job_ids:
+        await execute(job_id)
+    return len(job_ids)
+
+
+async def work_forever(poll_interval: float = POLL_INTERVAL):
+    while True:
+        try:
+            if await run_pending():
+                continue
+        except Exception:
+            logger.exception("job worker iteration failed")
+        await asyncio.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    # Run through the imported modules so handlers registered by app.payments and app.archive are visible
+    from app import archive, jobs, migrations, outbox, payments  # noqa: F401
+
+    async def main():
+        await migrations.check_schema()
+        await asyncio.gather(jobs.work_forever(), outbox.relay_forever(), archive.maintain_forever())
+
+    logging.basicConfig(level=logging.INFO)
+    logger.info("draining jobs and the outbox: %s", ", ".join(sorted(jobs.HANDLERS)))
+    asyncio.run(main())
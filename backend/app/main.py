@@ -1,55 +1,124 @@
-from fastapi import FastAPI, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app import models, schemas, db, security, auth
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Response, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import func, insert, select, tuple_, union, update
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload
+from app import models, schemas, db, security, auth, pagination, querycount, cache, metrics
+from app import idempotency, transitions, jobs, matching, ratelimit, migrations, outbox, fastjson
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import heapq
+import itertools
 from typing import List
-from app import payments
-
-
-
-# Create DB tables
-models.Base.metadata.create_all(bind=db.engine)
-
-app = FastAPI()
-
-# Dependency to get DB session
-def get_db():
-    session = db.SessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
+from datetime import datetime, timezone
+from app import payments, realtime, exports, search, replicas, archive
+
+
+
+# Tables come from `alembic upgrade head`; each worker only checks the revision
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await migrations.check_schema()
+    await realtime.broker.start()
+    await ratelimit.backend.start()
+    tasks = [
+        asyncio.create_task(idempotency.sweep_forever()),
+        asyncio.create_task(matching.index.sync_forever()),
+    ]
+    if jobs.IN_APP:
+        tasks.append(asyncio.create_task(jobs.work_forever()))
+        tasks.append(asyncio.create_task(outbox.relay_forever()))
+    for index in (search.trip_index, search.request_index):
+        if index.enabled:
+            tasks.append(asyncio.create_task(index.sync_forever()))
+    if replicas.replica_set.replicas:
+        tasks.append(asyncio.create_task(replicas.replica_set.health_forever()))
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await realtime.broker.stop()
+    await ratelimit.backend.stop()
+    security.shutdown_executor()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(querycount.QueryBudgetMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(replicas.ReadYourWritesMiddleware)
 
 # -----------------------------
 # Health check
 # -----------------------------
 @app.get("/ping")
-def ping():
+@querycount.budget(0)
+async def ping():
     return {"status": "ok"}
 
 
+@app.get("/db/pool")
+@querycount.budget(0)
+async def db_pool():
+    return {**db.pool_status(), "replicas": replicas.replica_set.status()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+@querycount.budget(0)
+async def prometheus_metrics():
+    return metrics.render()
+
+
+@app.get("/cache/stats")
+@querycount.budget(0)
+async def cache_stats():
+    return cache.response_cache.stats()
+
+
 # -----------------------------
 # Auth
 # -----------------------------
-@app.post("/signup", response_model=schemas.UserResponse)
-def signup(user: schemas.UserCreate, session: Session = Depends(get_db)):
-    db_user = session.query(models.User).filter(
-        (models.User.username == user.username) | (models.User.email == user.email)
-    ).first()
+@app.post(
+    "/signup",
+    response_model=schemas.UserResponse,
+    dependencies=[Depends(ratelimit.per_ip(ratelimit.signup))],
+)
+@querycount.budget(3)
+async def signup(user: schemas.UserCreate, session: AsyncSession = Depends(db.get_db)):
+    db_user = await session.scalar(
+        select(models.User).where(
+            (models.User.username == user.username) | (models.User.email == user.email)
+        )
+    )
     if db_user:
         raise HTTPException(status_code=400, detail="Username or email already exists")
-    hashed_pw = security.hash_password(user.password)
+    # bcrypt is CPU-bound; it runs in the bounded hashing pool
+    hashed_pw = await security.hash_password_async(user.password)
     new_user = models.User(username=user.username, email=user.email, hashed_password=hashed_pw)
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
+    await session.refresh(new_user)
     return new_user
 
 
-@app.post("/login", response_model=schemas.Token)
-def login(user: schemas.UserLogin, session: Session = Depends(get_db)):
-    db_user = session.query(models.User).filter(models.User.username == user.username).first()
-    if not db_user or not security.verify_password(user.password, db_user.hashed_password):
+@app.post(
+    "/login",
+    response_model=schemas.Token,
+    dependencies=[Depends(ratelimit.per_ip(ratelimit.login))],
+)
+@querycount.budget(2)
+async def login(user: schemas.UserLogin, session: AsyncSession = Depends(db.get_db)):
+    db_user = await session.scalar(select(models.User).where(models.User.username == user.username))
+    if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await security.verify_and_update_async(user.password, db_user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Stored hash predates the current bcrypt cost; upgrade it in place
+        db_user.hashed_password = new_hash
+        await session.commit()
     token = auth.create_access_token({"sub": db_user.username})
     return {"access_token": token}
 
@@ -58,12 +127,12 @@ def login(user: schemas.UserLogin, session: Session = Depends(get_db)):
 # Trips
 # -----------------------------
 @app.post("/trips", response_model=schemas.TripResponse)
-def create_trip(
+@querycount.budget(3)
+async def create_trip(
     trip: schemas.TripCreate,
-    session: Session = Depends(get_db),
-    username: str = Depends(auth.get_current_user),
+    session: AsyncSession = Depends(db.get_db),
+    user: auth.Principal = Depends(auth.get_current_user),
 ):
-    user = session.query(models.User).filter(models.User.username == username).first()
     new_trip = models.Trip(
         origin=trip.origin,
         destination=trip.destination,
@@ -71,35 +140,138 @@ def create_trip(
         user_id=user.id
     )
     session.add(new_trip)
-    session.commit()
-    session.refresh(new_trip)
+    await session.commit()
+    await session.refresh(new_trip)
+    matching.index.add(new_trip)
+    search.trip_index.add(new_trip)
     return new_trip
 
 
-@app.get("/trips", response_model=List[schemas.TripResponse])
-def list_trips(session: Session = Depends(get_db)):
-    return session.query(models.Trip).all()
+def validate_bulk(items, schema):
+    """Split raw bulk items into (index, validated) pairs and per-item errors."""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as exc:
+            errors.append({"index": index, "detail": exc.errors(include_url=False, include_context=False)})
+    return valid, errors
+
+
+@app.post("/trips/bulk", response_model=schemas.TripBulkResponse)
+@querycount.budget(2)
+async def create_trips_bulk(
+    batch: schemas.BulkCreate,
+    session: AsyncSession = Depends(db.get_db),
+    user: auth.Principal = Depends(auth.get_current_user),
+):
+    valid, errors = validate_bulk(batch.items, schemas.TripCreate)
+    created = []
+    if valid:
+        rows = [{**trip.model_dump(), "user_id": user.id} for _, trip in valid]
+        # One multi-row INSERT ... RETURNING, rows come back in input order
+        created = (await session.scalars(
+            insert(models.Trip).returning(models.Trip, sort_by_parameter_order=True), rows
+        )).all()
+        await session.commit()
+        matching.index.add_many(created)
+        search.trip_index.add_many(created)
+    return {"created": created, "errors": errors}
+
+
+@app.get("/trips", response_model=schemas.TripPage)
+@querycount.budget(1)
+async def list_trips(
+    origin: str | None = None,
+    destination: str | None = None,
+    date_from: schemas.NaiveUTCDatetime | None = None,
+    date_to: schemas.NaiveUTCDatetime | None = None,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    session: AsyncSession = Depends(replicas.get_read_db),
+):
+    query = select(*fastjson.columns(models.Trip, schemas.TripResponse))
+    if origin:
+        query = query.where(models.Trip.origin == origin)
+    if destination:
+        query = query.where(models.Trip.destination == destination)
+    if date_from:
+        query = query.where(models.Trip.travel_date >= date_from)
+    if date_to:
+        query = query.where(models.Trip.travel_date <= date_to)
+    if cursor:
+        after_date, after_id = pagination.decode_cursor(cursor)
+        query = query.where(tuple_(models.Trip.travel_date, models.Trip.id) > (after_date, after_id))
+
+    # Fetch one extra row to know whether another page exists
+    query = query.order_by(models.Trip.travel_date, models.Trip.id).limit(limit + 1)
+    trips = (await session.execute(query)).all()
+    next_cursor = None
+    if len(trips) > limit:
+        trips = trips[:limit]
+        next_cursor = pagination.encode_cursor(trips[-1].travel_date, trips[-1].id)
+    # Column tuples straight to JSON; response_model stays for the docs only
+    items = fastjson.items(trips, schemas.TripResponse)
+    return fastjson.FastJSONResponse({"items": items, "next_cursor": next_cursor})
+
+
+@app.get("/trips/match", response_model=List[schemas.TripResponse])
+@querycount.budget(1)
+async def match_trips(
+    origin: str,
+    destination: str,
+    date_from: schemas.NaiveUTCDatetime | None = None,
+    date_to: schemas.NaiveUTCDatetime | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(db.get_db),
+):
+    """Upcoming trips on a route within the date window, soonest first."""
+    date_from = max(date_from, datetime.utcnow()) if date_from else datetime.utcnow()
+    if matching.index.loaded:
+        entries = matching.index.match(origin, destination, date_from, date_to, limit)
+        return [matching.as_trip(entry) for entry in entries]
+
+    # Index still loading: same answer from the database (exact route names only)
+    query = select(models.Trip).where(
+        models.Trip.origin == origin,
+        models.Trip.destination == destination,
+        models.Trip.travel_date >= date_from,
+    )
+    if date_to:
+        query = query.where(models.Trip.travel_date <= date_to)
+    query = query.order_by(models.Trip.travel_date, models.Trip.id).limit(limit)
+    return (await session.scalars(query)).all()
 
 
 @app.get("/trips/{trip_id}", response_model=schemas.TripResponse)
-def get_trip(trip_id: int, session: Session = Depends(get_db)):
-    trip = session.query(models.Trip).filter(models.Trip.id == trip_id).first()
+@querycount.budget(1)
+async def get_trip(trip_id: int, session: AsyncSession = Depends(replicas.get_read_db)):
+    key = cache.trip_key(trip_id)
+    # Just wrote? Then skip the cache too; see replicas.get_read_db
+    cached = None if session.info.get("pinned") else await cache.response_cache.get(key)
+    if cached is not None:
+        return cached
+    trip = await session.get(models.Trip, trip_id)
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
-    return trip
+    data = schemas.TripResponse.model_validate(trip).model_dump(mode="json")
+    # Only the primary fills the cache; see replicas.get_read_db
+    if not session.info.get("replica"):
+        await cache.response_cache.set(key, data)
+    return data
 
 
 # -----------------------------
 # Requests
 # -----------------------------
 @app.post("/requests", response_model=schemas.RequestResponse)
-def create_request(
+@querycount.budget(4)
+async def create_request(
     request: schemas.RequestCreate,
-    session: Session = Depends(get_db),
-    username: str = Depends(auth.get_current_user),
+    session: AsyncSession = Depends(db.get_db),
+    user: auth.Principal = Depends(auth.get_current_user),
 ):
-    user = session.query(models.User).filter(models.User.username == username).first()
-    trip = session.query(models.Trip).filter(models.Trip.id == request.trip_id).first()
+    trip = await session.get(models.Trip, request.trip_id)
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
 
@@ -111,36 +283,106 @@ def create_request(
         requester_id=user.id
     )
     session.add(new_request)
-    session.commit()
-    session.refresh(new_request)
+    await session.commit()
+    await cache.response_cache.invalidate(cache.trip_requests_key(request.trip_id))
+    await session.refresh(new_request)
+    search.request_index.add(new_request)
     return new_request
 
 
+@app.post("/requests/bulk", response_model=schemas.RequestBulkResponse)
+@querycount.budget(3)
+async def create_requests_bulk(
+    batch: schemas.BulkCreate,
+    session: AsyncSession = Depends(db.get_db),
+    user: auth.Principal = Depends(auth.get_current_user),
+):
+    valid, errors = validate_bulk(batch.items, schemas.RequestCreate)
+    trip_ids = {request.trip_id for _, request in valid}
+    existing = set()
+    if trip_ids:
+        existing = set((await session.scalars(
+            select(models.Trip.id).where(models.Trip.id.in_(trip_ids))
+        )).all())
+
+    rows = []
+    for index, request in valid:
+        if request.trip_id not in existing:
+            errors.append({"index": index, "detail": "Trip not found"})
+            continue
+        rows.append({**request.model_dump(), "status": models.RequestStatus.pending, "requester_id": user.id})
+    errors.sort(key=lambda e: e["index"])
+
+    created = []
+    if rows:
+        created = (await session.scalars(
+            insert(models.Request).returning(models.Request, sort_by_parameter_order=True), rows
+        )).all()
+        await session.commit()
+        await cache.response_cache.invalidate(*[cache.trip_requests_key(t) for t in {r["trip_id"] for r in rows}])
+        search.request_index.add_many(created)
+    return {"created": created, "errors": errors}
+
+
 @app.get("/requests/{trip_id}", response_model=List[schemas.RequestResponse])
-def list_requests(trip_id: int, session: Session = Depends(get_db)):
-    return session.query(models.Request).filter(models.Request.trip_id == trip_id).all()
+@querycount.budget(1)
+async def list_requests(trip_id: int, session: AsyncSession = Depends(replicas.get_read_db)):
+    key = cache.trip_requests_key(trip_id)
+    # Just wrote? Then skip the cache too; see replicas.get_read_db
+    cached = None if session.info.get("pinned") else await cache.response_cache.get(key)
+    if cached is not None:
+        return fastjson.FastJSONResponse(cached)
+    requests = (await session.execute(
+        select(*fastjson.columns(models.Request, schemas.RequestResponse)).where(models.Request.trip_id == trip_id)
+    )).all()
+    # Cached as the encoded body, so a hit skips serialization as well
+    body = fastjson.dumps(fastjson.items(requests, schemas.RequestResponse))
+    if not session.info.get("replica"):
+        await cache.response_cache.set(key, body)
+    return fastjson.FastJSONResponse(body)
+
+
+async def change_request_status(session, request_id, target, user, idempotency_key, if_match):
+    async def apply():
+        req = await transitions.transition_request(
+            session, request_id, target, transitions.parse_if_match(if_match), actor_id=user.id
+        )
+        return schemas.RequestResponse.model_validate(req).model_dump(mode="json")
+
+    async def invalidate(body):
+        await cache.response_cache.invalidate(cache.trip_requests_key(body["trip_id"]))
+
+    action = "accept" if target == models.RequestStatus.accepted else "reject"
+    scope = f"user:{user.id} PUT /requests/{request_id}/{action}"
+    return await idempotency.run(session, scope, idempotency_key, apply, on_commit=invalidate)
 
 
 @app.put("/requests/{request_id}/accept", response_model=schemas.RequestResponse)
-def accept_request(request_id: int, session: Session = Depends(get_db)):
-    req = session.query(models.Request).filter(models.Request.id == request_id).first()
-    if not req:
-        raise HTTPException(status_code=404, detail="Request not found")
-    req.status = "accepted"
-    session.commit()
-    session.refresh(req)
-    return req
+@querycount.budget(4)
+async def accept_request(
+    request_id: int,
+    idempotency_key: str | None = Header(None),
+    if_match: str | None = Header(None),
+    session: AsyncSession = Depends(db.get_db),
+    user: auth.Principal = Depends(auth.get_current_user),
+):
+    return await change_request_status(
+        session, request_id, models.RequestStatus.accepted, user, idempotency_key, if_match
+    )
 
 
 @app.put("/requests/{request_id}/reject", response_model=schemas.RequestResponse)
-def reject_request(request_id: int, session: Session = Depends(get_db)):
-    req = session.query(models.Request).filter(models.Request.id == request_id).first()
-    if not req:
-        raise HTTPException(status_code=404, detail="Request not found")
-    req.status = "rejected"
-    session.commit()
-    session.refresh(req)
-    return req
+@querycount.budget(4)
+async def reject_request(
+    request_id: int,
+    idempotency_key: str | None = Header(None),
+    if_match: str | None = Header(None),
+    session: AsyncSession = Depends(db.get_db),
+    user: auth.Principal = Depends(auth.get_current_user),
+):
+    return await change_request_status(
+        session, request_id, models.RequestStatus.rejected, user, idempotency_key, if_match
+    )
 
 
 
@@ -149,25 +391,29 @@ def reject_request(request_id: int, session: Session = Depends(get_db)):
 # -----------------------------
 
 def ensure_request_access(user_id: int, request_obj: models.Request):
-    """Ensure the given user is either the requester or the traveler of this request."""
+    """Ensure that only requester or trip owner can access the request"""
     if user_id not in [request_obj.requester_id, request_obj.trip.user_id]:
         raise HTTPException(
             status_code=403,
-            detail="You are not authorized to access this request's messages"
+            detail="You are not authorized to access messages for this request"
         )
 
 
-@app.post("/messages", response_model=schemas.MessageResponse)
-def send_message(
+@app.post(
+    "/messages",
+    response_model=schemas.MessageResponse,
+    dependencies=[Depends(ratelimit.per_user(ratelimit.messages))],
+)
+@querycount.budget(5)
+async def send_message(
     message: schemas.MessageCreate,
-    session: Session = Depends(get_db),
-    username: str = Depends(auth.get_current_user),
+    session: AsyncSession = Depends(db.get_db),
+    sender: auth.Principal = Depends(auth.get_current_user),
 ):
-    sender = session.query(models.User).filter(models.User.username == username).first()
-    if not sender:
-        raise HTTPException(status_code=404, detail="Sender not found")
-
-    request_obj = session.query(models.Request).filter(models.Request.id == message.request_id).first()
+    # One JOIN brings the trip owner along for the access check
+    request_obj = await session.get(
+        models.Request, message.request_id, options=[joinedload(models.Request.trip)]
+    )
     if not request_obj:
         raise HTTPException(status_code=404, detail="Request not found")
 
@@ -187,46 +433,204 @@ def send_message(
         content=message.content,
     )
     session.add(new_message)
-    session.commit()
-    session.refresh(new_message)
+    await session.flush()
+    outbox.emit(session, "message.sent", {
+        "message_id": new_message.id,
+        "request_id": new_message.request_id,
+        "sender_id": new_message.sender_id,
+        "receiver_id": new_message.receiver_id,
+    })
+    await session.commit()
+    await session.refresh(new_message)
+    await realtime.publish_message(new_message)
     return new_message
 
 
 
 
-# put this helper somewhere common (e.g. in main.py or a utils.py)
-def ensure_request_access(user_id: int, request_obj: models.Request):
-    """Ensure that only requester or trip owner can access the request"""
-    if user_id not in [request_obj.requester_id, request_obj.trip.user_id]:
-        raise HTTPException(
-            status_code=403,
-            detail="You are not authorized to access messages for this request"
-        )
-
-
-@app.get("/messages/{request_id}", response_model=List[schemas.MessageResponse])
-def get_messages(
+@app.get("/messages/{request_id}", response_model=schemas.MessagePage)
+@querycount.budget(5)
+async def get_messages(
     request_id: int,
-    session: Session = Depends(get_db),
-    username: str = Depends(auth.get_current_user),
+    since: str | None = None,
+    before: str | None = None,
+    limit: int = Query(100, ge=1, le=500),
+    if_none_match: str | None = Header(None),
+    session: AsyncSession = Depends(replicas.get_read_db),
+    user: auth.Principal = Depends(auth.get_current_user),
 ):
-    user = session.query(models.User).filter(models.User.username == username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    if since and before:
+        raise HTTPException(status_code=400, detail="Use either since or before, not both")
 
-    request_obj = session.query(models.Request).filter(models.Request.id == request_id).first()
+    request_obj = await session.get(
+        models.Request, request_id,
+        options=[joinedload(models.Request.trip), joinedload(models.Request.message_archive)],
+    )
     if not request_obj:
         raise HTTPException(status_code=404, detail="Request not found")
 
     # ✅ Use the same helper as send_message
     ensure_request_access(user.id, request_obj)
 
-    return (
-        session.query(models.Message)
-        .filter(models.Message.request_id == request_id)
-        .order_by(models.Message.timestamp)
-        .all()
+    # Messages are append-only, so the newest one identifies the conversation state
+    newest = (await session.execute(
+        select(models.Message.id, models.Message.timestamp)
+        .where(models.Message.request_id == request_id)
+        .order_by(models.Message.timestamp.desc(), models.Message.id.desc())
+        .limit(1)
+    )).first()
+    state = f"{newest.timestamp.isoformat()}/{newest.id}" if newest else "empty"
+    message_archive = request_obj.message_archive
+    if message_archive is not None:
+        state += f"|archived {message_archive.message_count}/{message_archive.last_at.isoformat()}"
+    digest = hashlib.sha1(f"{request_id}|{state}|{since}|{before}|{limit}".encode()).hexdigest()
+    etag = f'W/"{digest}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    query = select(*fastjson.columns(models.Message, schemas.MessageResponse))
+    query = query.where(models.Message.request_id == request_id)
+    key = tuple_(models.Message.timestamp, models.Message.id)
+    cursor = pagination.decode_cursor(before or since) if before or since else None
+    if before:
+        query = query.where(key < cursor)
+        query = query.order_by(models.Message.timestamp.desc(), models.Message.id.desc())
+    else:
+        if since:
+            query = query.where(key > cursor)
+        query = query.order_by(models.Message.timestamp, models.Message.id)
+
+    messages = list((await session.execute(query.limit(limit + 1))).all())
+    if message_archive is not None:
+        # Closed conversations moved to the archive; page through both in the same key order
+        archived = await archive.load_messages(session, request_id)
+        if before:
+            archived = [m for m in reversed(archived) if (m.timestamp, m.id) < cursor]
+        elif since:
+            archived = [m for m in archived if (m.timestamp, m.id) > cursor]
+        merged = heapq.merge(archived, messages, key=lambda m: (m.timestamp, m.id), reverse=bool(before))
+        messages = list(itertools.islice(merged, limit + 1))
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if before:
+        messages.reverse()
+
+    if messages:
+        next_cursor = pagination.encode_cursor(messages[-1].timestamp, messages[-1].id)
+        prev_cursor = pagination.encode_cursor(messages[0].timestamp, messages[0].id)
+    else:
+        # Nothing new: keep polling from the same place
+        next_cursor, prev_cursor = since, before
+
+    return fastjson.FastJSONResponse(
+        {
+            "items": fastjson.items(messages, schemas.MessageResponse),
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+            "has_more": has_more,
+        },
+        headers={"ETag": etag},
     )
 
 
-app.include_router(payments.router)
\ No newline at end of file
+@app.put("/messages/{request_id}/read")
+@querycount.budget(3)
+async def mark_messages_read(
+    request_id: int,
+    session: AsyncSession = Depends(db.get_db),
+    user: auth.Principal = Depends(auth.get_current_user),
+):
+    request_obj = await session.get(
+        models.Request, request_id, options=[joinedload(models.Request.trip)]
+    )
+    if not request_obj:
+        raise HTTPException(status_code=404, detail="Request not found")
+    ensure_request_access(user.id, request_obj)
+
+    result = await session.execute(
+        update(models.Message)
+        .where(
+            models.Message.request_id == request_id,
+            models.Message.receiver_id == user.id,
+            models.Message.read_at.is_(None),
+        )
+        .values(read_at=datetime.now(timezone.utc))
+    )
+    await session.commit()
+    return {"marked": result.rowcount}
+
+
+# -----------------------------
+# Dashboard
+# -----------------------------
+@app.get("/me/dashboard", response_model=schemas.DashboardResponse)
+@querycount.budget(3)
+async def dashboard(
+    session: AsyncSession = Depends(db.get_db),
+    user: auth.Principal = Depends(auth.get_current_user),
+):
+    """Everything the dashboard shows, in two queries however many trips the user has."""
+    trips = (await session.scalars(
+        select(models.Trip).where(models.Trip.user_id == user.id).order_by(models.Trip.travel_date, models.Trip.id)
+    )).all()
+
+    # Requests on the user's trips plus the user's own requests, each with
+    # its unread count and latest escrow
+    mine = union(
+        select(models.Request.id).join(models.Trip).where(models.Trip.user_id == user.id),
+        select(models.Request.id).where(models.Request.requester_id == user.id),
+    )
+    unread = (
+        select(models.Message.request_id, func.count().label("unread"))
+        .where(models.Message.receiver_id == user.id, models.Message.read_at.is_(None))
+        .group_by(models.Message.request_id)
+        .subquery()
+    )
+    other = aliased(models.Escrow)
+    latest_escrow = (
+        select(other.id)
+        .where(other.request_id == models.Request.id)
+        .order_by(other.id.desc())
+        .limit(1)
+        .correlate(models.Request)
+        .scalar_subquery()
+    )
+    rows = (await session.execute(
+        select(models.Request, models.Trip, unread.c.unread, models.Escrow.id, models.Escrow.status)
+        .join(models.Trip, models.Request.trip_id == models.Trip.id)
+        .outerjoin(unread, unread.c.request_id == models.Request.id)
+        .outerjoin(models.Escrow, models.Escrow.id == latest_escrow)
+        .where(models.Request.id.in_(mine))
+        .order_by(models.Request.id)
+    )).all()
+
+    incoming = {trip.id: [] for trip in trips}
+    outgoing = []
+    unread_total = 0
+    for request_obj, trip, unread_count, escrow_id, escrow_status in rows:
+        item = {
+            **schemas.RequestResponse.model_validate(request_obj).model_dump(),
+            "unread_count": unread_count or 0,
+            "escrow_id": escrow_id,
+            "escrow_status": escrow_status,
+        }
+        unread_total += item["unread_count"]
+        if trip.id in incoming:
+            incoming[trip.id].append(item)
+        if request_obj.requester_id == user.id:
+            outgoing.append({**item, "trip": trip})
+
+    return {
+        "trips": [
+            {**schemas.TripResponse.model_validate(trip).model_dump(), "requests": incoming[trip.id]}
+            for trip in trips
+        ],
+        "outgoing_requests": outgoing,
+        "unread_total": unread_total,
+    }
+
+
+app.include_router(payments.router)
+app.include_router(realtime.router)
+app.include_router(exports.router)
+app.include_router(search.router)
@@ -0,0 +1,143 @@
+import asyncio
+import bisect
+import logging
+import math
+import os
+from datetime import datetime
+from sqlalchemy import select
+from app import db, models, schemas
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = float(os.getenv("MATCHING_REFRESH_INTERVAL", "5"))
+# Ids are handed out before commit, so a trip may land behind the watermark;
+# each refresh re-reads this many ids back and skips the ones it already has
+REFRESH_LOOKBACK = int(os.getenv("MATCHING_REFRESH_LOOKBACK", "1000"))
+
+COLUMNS = (
+    models.Trip.travel_date,
+    models.Trip.id,
+    models.Trip.user_id,
+    models.Trip.origin,
+    models.Trip.destination,
+)
+
+
+def normalize(city: str) -> str:
+    return " ".join(city.split()).casefold()
+
+
+class RouteIndex:
+    """Upcoming trips per normalized (origin, destination), sorted by (travel_date, id).
+
+    Entries are (travel_date, id, user_id, origin, destination) tuples, so a
+    date window is two bisects and matches come out soonest-first.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.max_id = 0
+        self.loaded = False
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.routes.values())
+
+    def add(self, trip):
+        """Insert one trip (model instance or row); no-op if already indexed."""
+        entry = (trip.travel_date, trip.id, trip.user_id, trip.origin, trip.destination)
+        entries = self.routes.setdefault((normalize(trip.origin), normalize(trip.destination)), [])
+        pos = bisect.bisect_left(entries, entry)
+        if pos == len(entries) or entries[pos][1] != trip.id:
+            entries.insert(pos, entry)
+        self.max_id = max(self.max_id, trip.id)
+
+    def add_many(self, trips):
+        # Group then sort once; cheaper than one insort per row for big batches
+        grouped = {}
+        for trip in trips:
+            key = (normalize(trip.origin), normalize(trip.destination))
+            grouped.setdefault(key, []).append(
+                (trip.travel_date, trip.id, trip.user_id, trip.origin, trip.destination)
+            )
+            self.max_id = max(self.max_id, trip.id)
+        for key, new in grouped.items():
+            entries = self.routes.get(key)
+            if entries:
+                known = {entry[1] for entry in entries}
+                new = [entry for entry in new if entry[1] not in known] + entries
+            self.routes[key] = sorted(new)
+
+    def prune(self, before: datetime) -> int:
+        """Drop trips departing before `before`."""
+        removed = 0
+        for key in list(self.routes):
+            entries = self.routes[key]
+            cut = bisect.bisect_left(entries, (before,))
+            if cut:
+                del entries[:cut]
+                removed += cut
+            if not entries:
+                del self.routes[key]
+        return removed
+
+    def match(self, origin: str, destination: str, date_from: datetime | None = None,
+              date_to: datetime | None = None, limit: int = 20):
+        entries = self.routes.get((normalize(origin), normalize(destination)))
+        if not entries:
+            return []
+        start = bisect.bisect_left(entries, (schemas.naive_utc(date_from),)) if date_from else 0
+        end = bisect.bisect_right(entries, (schemas.naive_utc(date_to), math.inf)) if date_to else len(entries)
+        return entries[start:min(end, start + limit)]
+
+    # -----------------------------
+    # Database sync
+    # -----------------------------
+    async def load(self):
+        now = datetime.utcnow()
+        self.routes = {}
+        async with db.AsyncSessionLocal() as session:
+            result = await session.stream(
+                select(*COLUMNS).where(models.Trip.travel_date >= now).execution_options(yield_per=10_000)
+            )
+            async for rows in result.partitions():
+                self.add_many(rows)
+        self.loaded = True
+        logger.info("route index loaded: %d upcoming trips on %d routes", len(self), len(self.routes))
+
+    async def refresh(self):
+        """Pick up trips committed by other workers since the last refresh."""
+        async with db.AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(*COLUMNS).where(
+                    models.Trip.id > self.max_id - REFRESH_LOOKBACK,
+                    models.Trip.travel_date >= datetime.utcnow(),
+                )
+            )).all()
+        for row in rows:
+            self.add(row)
+        self.prune(datetime.utcnow())
+
+    async def sync_forever(self, interval: float = REFRESH_INTERVAL):
+        while True:
+            try:
+                if self.loaded:
+                    await self.refresh()
+                else:
+                    await self.load()
+            except Exception:
+                logger.exception("route index sync failed")
+            await asyncio.sleep(interval)
+
+
+def as_trip(entry) -> dict:
+    travel_date, trip_id, user_id, origin, destination = entry
+    return {
+        "id": trip_id,
+        "user_id": user_id,
+        "origin": origin,
+        "destination": destination,
+        "travel_date": travel_date,
+    }
+
+
+index = RouteIndex()
@@ -0,0 +1,172 @@
+import bisect
+import contextvars
+import os
+import time
+from sqlalchemy import event
+from app import cache, db
+
+# Small in-process registry rendered in the Prometheus text format.
+# Recording is a dict lookup and an add, cheap enough to leave on.
+ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.values = {}
+
+    def inc(self, *label_values, amount=1.0):
+        self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def samples(self):
+        for label_values, value in self.values.items():
+            yield f"{self.name}{_labels(self.labels, label_values)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount=1.0):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *label_values):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def samples(self):
+        for label_values, entry in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), entry[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.labels, label_values, [le])} {cumulative}"
+            yield f"{self.name}_count{_labels(self.labels, label_values)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, label_values)} {entry[-1]}"
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests handled.", ["method", "route", "status"])
+LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.", ["method", "route"])
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled.", ["method"])
+QUERIES = Counter("db_queries_total", "SQL statements executed, by route.", ["route"])
+QUERY_TIME = Histogram("db_query_duration_seconds", "SQL statement latency, by route.", ["route"])
+
+REGISTRY = [REQUESTS, LATENCY, IN_FLIGHT, QUERIES, QUERY_TIME]
+
+
+# -----------------------------
+# SQLAlchemy hooks
+# -----------------------------
+_route_queries = contextvars.ContextVar("route_queries", default=None)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    queries = _route_queries.get()
+    if queries is not None:
+        queries.append(time.perf_counter() - context._metrics_start)
+
+
+if ENABLED:
+    for _engine in db.sync_engines():
+        event.listen(_engine, "before_cursor_execute", _before_execute)
+        event.listen(_engine, "after_cursor_execute", _after_execute)
+
+
+# -----------------------------
+# Middleware
+# -----------------------------
+class MetricsMiddleware:
+    """ASGI middleware recording counts, latency and DB time per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        queries = []
+        token = _route_queries.set(queries)
+        IN_FLIGHT.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec(method)
+            _route_queries.reset(token)
+            # Templates ("/trips/{trip_id}") keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUESTS.inc(method, route, status_code)
+            LATENCY.observe(elapsed, method, route)
+            if queries:
+                QUERIES.inc(route, amount=len(queries))
+                for duration in queries:
+                    QUERY_TIME.observe(duration, route)
+
+
+# -----------------------------
+# Exposition
+# -----------------------------
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+
+    pool = db.pool_status()
+    for key in ("checked_out", "checked_in", "overflow", "size"):
+        if key in pool:
+            lines.append(f"# TYPE db_pool_{key} gauge")
+            lines.append(f"db_pool_{key} {pool[key]}")
+    lines.append("# TYPE db_pool_acquisitions_total counter")
+    lines.append(f"db_pool_acquisitions_total {pool['acquisitions']}")
+    lines.append("# TYPE db_pool_timeouts_total counter")
+    lines.append(f"db_pool_timeouts_total {pool['timeouts']}")
+    lines.append("# TYPE db_pool_wait_seconds_total counter")
+    lines.append(f"db_pool_wait_seconds_total {pool['wait_ms_total'] / 1000}")
+
+    lines.append("# TYPE response_cache_requests_total counter")
+    for resource, counts in cache.response_cache.stats()["resources"].items():
+        for outcome, key in (("hit", "hits"), ("miss", "misses")):
+            labels = _labels(("resource", "outcome"), (resource, outcome))
+            lines.append(f"response_cache_requests_total{labels} {counts[key]}")
+    return "\n".join(lines) + "\n"
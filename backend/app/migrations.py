@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# "error" refuses to boot against an out-of-date schema, "warn" only logs, "off" skips the check
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "error")
+# How long boot waits for the database to accept connections
+STARTUP_TIMEOUT = float(os.getenv("DB_STARTUP_TIMEOUT", "30"))
+
+VERSIONS_DIR = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+
+_REVISION = re.compile(r"^revision: str = '(\w+)'", re.M)
+_DOWN_REVISION = re.compile(r"^down_revision: .*$", re.M)
+_ID = re.compile(r"'(\w+)'")
+
+
+def head_revisions(versions_dir: Path = VERSIONS_DIR) -> set[str]:
+    """Revisions no other migration builds on.
+
+    Importing alembic.script drags in mako and every DDL dialect (~140 ms
+    per worker); the files follow our script.py.mako template, so reading
+    the two assignments is enough.
+    """
+    revisions, parents = set(), set()
+    for path in versions_dir.glob("*.py"):
+        source = path.read_text()
+        revision = _REVISION.search(source)
+        down = _DOWN_REVISION.search(source)
+        if revision:
+            revisions.add(revision.group(1))
+            if down:
+                parents.update(_ID.findall(down.group(0)))
+    return revisions - parents
+
+
+async def current_revisions() -> set[str]:
+    """What alembic_version says, waiting up to STARTUP_TIMEOUT for the database."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    delay = 0.5
+    while True:
+        try:
+            async with db.async_engine.connect() as conn:
+                if not await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("alembic_version")):
+                    return set()
+                return set((await conn.scalars(text("SELECT version_num FROM alembic_version"))).all())
+        except (OSError, DBAPIError) as exc:
+            if time.monotonic() + delay > deadline:
+                raise
+            logger.warning("Database not reachable yet (%s); retrying in %.1fs", exc, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5)
+
+
+async def check_schema():
+    """Run once per worker at startup; migrations themselves stay with `alembic upgrade head`."""
+    if SCHEMA_CHECK == "off":
+        return
+    expected = head_revisions()
+    current = await current_revisions()
+    if current == expected:
+        return
+    problem = (
+        f"Database schema is at {sorted(current) or 'no revision'}, code expects {sorted(expected)}; "
+        "run `alembic upgrade head`"
+    )
+    if SCHEMA_CHECK == "warn":
+        logger.warning(problem)
+    else:
+        raise RuntimeError(problem)
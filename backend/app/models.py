@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, Text, func, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, Text, func, Float, Index, UniqueConstraint, text, LargeBinary
+from sqlalchemy.orm import deferred, relationship
 from app.db import Base
 import enum
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 class User(Base):
@@ -24,7 +24,7 @@ class Trip(Base):
     __tablename__ = "trips"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     origin = Column(String, nullable=False)
     destination = Column(String, nullable=False)
     travel_date = Column(DateTime, nullable=False)
@@ -33,6 +33,13 @@ class Trip(Base):
     traveler = relationship("User", back_populates="trips")
     requests = relationship("Request", back_populates="trip")
 
+    # Keyset pagination on GET /trips walks (travel_date, id); route filters
+    # narrow by (origin, destination) first and then scan by date.
+    __table_args__ = (
+        Index("ix_trips_origin_destination_travel_date", "origin", "destination", "travel_date"),
+        Index("ix_trips_travel_date_id", "travel_date", "id"),
+    )
+
 
 class RequestStatus(str, enum.Enum):
     pending = "pending"
@@ -44,35 +51,86 @@ class Request(Base):
     __tablename__ = "requests"
 
     id = Column(Integer, primary_key=True, index=True)
-    trip_id = Column(Integer, ForeignKey("trips.id"), nullable=False)
-    requester_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    trip_id = Column(Integer, ForeignKey("trips.id"), nullable=False, index=True)
+    requester_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     product_name = Column(String, nullable=False)
     product_description = Column(String, nullable=True)
     status = Column(Enum(RequestStatus), default=RequestStatus.pending)
+    # Bumped on every write; ORM flushes and state transitions check it
+    version = Column(Integer, nullable=False, server_default="1")
 
     # Relationships
     trip = relationship("Trip", back_populates="requests")
     requester = relationship("User", back_populates="requests")
-    messages = relationship("Message", back_populates="request", cascade="all, delete")
+    # ON DELETE CASCADE removes the messages and archive; the ORM need not load them first
+    messages = relationship("Message", back_populates="request", cascade="all, delete", passive_deletes=True)
+    message_archive = relationship(
+        "MessageArchive", back_populates="request", uselist=False, cascade="all, delete", passive_deletes=True
+    )
     escrow = relationship("Escrow", back_populates="request", uselist=False)
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 
+# On Postgres the table is range-partitioned by month on timestamp (see
+# app.archive), and a partitioned table's primary key has to include the
+# partition key, so there it is (id, timestamp). The model maps id alone on
+# purpose: ids come from one sequence and stay unique, session.get() looks
+# messages up by id, and SQLite needs a lone INTEGER key for AUTOINCREMENT.
+# alembic/env.py leaves messages out of autogenerate on Postgres, where its
+# migrations are written by hand (a3f8c6d2e915).
 class Message(Base):
     __tablename__ = "messages"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     request_id = Column(Integer, ForeignKey("requests.id", ondelete="CASCADE"), nullable=False)
     sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     receiver_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     content = Column(Text, nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side too so every backend stores the full microsecond value
+    # that message cursors compare against
+    timestamp = Column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc), server_default=func.now()
+    )
+    read_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_messages")
     receiver = relationship("User", foreign_keys=[receiver_id], back_populates="received_messages")
     request = relationship("Request", back_populates="messages")
 
+    # GET /messages/{request_id} pages through a conversation by (timestamp, id)
+    __table_args__ = (
+        Index("ix_messages_request_id_timestamp_id", "request_id", "timestamp", "id"),
+        # Unread counts only ever look at the (small) unread part of the table
+        Index(
+            "ix_messages_unread",
+            "receiver_id",
+            "request_id",
+            postgresql_where=text("read_at IS NULL"),
+            sqlite_where=text("read_at IS NULL"),
+        ),
+        # Archiving deletes hot rows; ids must not be handed out a second time
+        {"sqlite_autoincrement": True},
+    )
+
+
+class MessageArchive(Base):
+    """A closed request's conversation, moved out of messages by app.archive."""
+
+    __tablename__ = "message_archives"
+
+    request_id = Column(Integer, ForeignKey("requests.id", ondelete="CASCADE"), primary_key=True)
+    message_count = Column(Integer, nullable=False)
+    first_at = Column(DateTime(timezone=True), nullable=False)
+    last_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    # zlib-compressed JSON; only read when someone opens the conversation
+    data = deferred(Column(LargeBinary, nullable=False))
+
+    request = relationship("Request", back_populates="message_archive")
+
 
 
 class EscrowStatus(str, enum.Enum):
@@ -80,17 +138,93 @@ class EscrowStatus(str, enum.Enum):
     paid = "paid"
     released = "released"
     refunded = "refunded"
+    failed = "failed"
 
 
 class Escrow(Base):
     __tablename__ = "escrows"
 
     id = Column(Integer, primary_key=True, index=True)
-    request_id = Column(Integer, ForeignKey("requests.id", ondelete="CASCADE"), nullable=False)
+    request_id = Column(Integer, ForeignKey("requests.id", ondelete="CASCADE"), nullable=False, index=True)
     amount_inr = Column(Float, nullable=False)
-    provider_payment_id = Column(String, nullable=False)  # e.g., Razorpay/Stripe payment_id
+    provider_payment_id = Column(String, nullable=False, index=True)  # e.g., Razorpay/Stripe payment_id
     status = Column(Enum(EscrowStatus), default=EscrowStatus.pending)
     created_at = Column(DateTime, default=datetime.utcnow)
+    version = Column(Integer, nullable=False, server_default="1")
 
     # Relationship
-    request = relationship("Request", back_populates="escrow")
\ No newline at end of file
+    request = relationship("Request", back_populates="escrow")
+
+    __mapper_args__ = {"version_id_col": version}
+
+    # At most one live (pending or paid) escrow per request
+    __table_args__ = (
+        Index(
+            "uq_escrows_active_request",
+            "request_id",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'paid')"),
+            sqlite_where=text("status IN ('pending', 'paid')"),
+        ),
+    )
+
+
+class IdempotencyKey(Base):
+    """Stored response for a client-supplied Idempotency-Key, replayed on retries."""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    scope = Column(String, nullable=False)  # e.g. "user:3 PUT /requests/7/accept"
+    key = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+    )
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class Job(Base):
+    """Unit of background work, claimed by workers with FOR UPDATE SKIP LOCKED."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.queued)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+
+class RateLimit(Base):
+    """Shared token-bucket state for app/ratelimit.py: when each bucket is next full."""
+    __tablename__ = "rate_limits"
+
+    key = Column(String, primary_key=True)
+    tat = Column(DateTime(timezone=True), nullable=False)
+
+
+class OutboxEvent(Base):
+    """Domain event written in the same transaction as the change it describes; see app/outbox.py."""
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import logging
+import os
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import db, jobs, models
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+
+# topic -> [(job kind, max attempts)]; "*" subscribes to every topic
+SUBSCRIBERS = {}
+
+
+def subscriber(*topics: str, max_attempts: int = 5):
+    """Register `async fn(session, event)` for `topics`.
+
+    Each subscriber gets its own job per event, so it is retried and
+    dead-lettered (job status "failed") independently of the others.
+    Like job handlers, subscribers must not commit.
+    """
+    def register(fn):
+        kind = f"outbox:{fn.__module__}.{fn.__qualname__}"
+        jobs.handler(kind)(fn)
+        for topic in topics:
+            SUBSCRIBERS.setdefault(topic, []).append((kind, max_attempts))
+        return fn
+    return register
+
+
+def emit(session: AsyncSession, topic: str, payload: dict):
+    """Add an event to the caller's transaction: one row, however many subscribers there are."""
+    event = models.OutboxEvent(topic=topic, payload=json.dumps(payload))
+    session.add(event)
+    return event
+
+
+# -----------------------------
+# Relay
+# -----------------------------
+async def relay(limit: int = BATCH_SIZE) -> int:
+    """Turn a batch of events into subscriber jobs and delete them, in one transaction."""
+    async with db.AsyncSessionLocal() as session:
+        events = (await session.scalars(
+            select(models.OutboxEvent)
+            .order_by(models.OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )).all()
+        if not events:
+            return 0
+        for event in events:
+            body = {
+                "id": event.id,
+                "topic": event.topic,
+                "payload": json.loads(event.payload),
+                "created_at": event.created_at.isoformat(),
+            }
+            for kind, max_attempts in SUBSCRIBERS.get(event.topic, []) + SUBSCRIBERS.get("*", []):
+                jobs.enqueue(session, kind, body, max_attempts=max_attempts)
+        await session.execute(
+            delete(models.OutboxEvent).where(models.OutboxEvent.id.in_([event.id for event in events]))
+        )
+        await session.commit()
+        return len(events)
+
+
+async def relay_forever(poll_interval: float = POLL_INTERVAL):
+    while True:
+        try:
+            if await relay():
+                continue
+        except Exception:
+            logger.exception("outbox relay iteration failed")
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,18 @@
+import base64
+from datetime import datetime
+from fastapi import HTTPException
+
+
+# Opaque keyset cursors: "<iso datetime>|<id>" in urlsafe base64.
+def encode_cursor(value: datetime, row_id: int) -> str:
+    raw = f"{value.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, row_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(value), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
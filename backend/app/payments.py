@@ -1,85 +1,161 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app import models, schemas, db, auth
-import uuid
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schemas, db, auth, querycount, idempotency, transitions, jobs
+from app.providers import provider
+import logging
 
-router = APIRouter(prefix="/payments", tags=["Payments"])
+logger = logging.getLogger(__name__)
 
+router = APIRouter(prefix="/payments", tags=["Payments"])
 
-# Dependency
-def get_db():
-    session = db.SessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
+EVENT_TARGETS = {
+    "payment.succeeded": models.EscrowStatus.paid,
+    "payment.failed": models.EscrowStatus.failed,
+}
 
 
 @router.post("/create", response_model=schemas.EscrowResponse)
-def create_payment(
+@querycount.budget(6)
+async def create_payment(
     escrow: schemas.EscrowCreate,
-    session: Session = Depends(get_db),
-    username: str = Depends(auth.get_current_user),
+    idempotency_key: str | None = Header(None),
+    session: AsyncSession = Depends(db.get_db),
+    user: auth.Principal = Depends(auth.get_current_user),
+):
+    async def apply():
+        request_obj = await session.get(models.Request, escrow.request_id)
+        if not request_obj:
+            raise HTTPException(status_code=404, detail="Request not found")
+
+        if request_obj.requester_id != user.id:
+            raise HTTPException(status_code=403, detail="Only requester can create payment")
+
+        if request_obj.status != models.RequestStatus.accepted:
+            raise HTTPException(status_code=403, detail="Payment can only be created after traveler accepts the request")
+
+        # Only record intent here; the provider call and its confirmation run in the job queue
+        reference = provider.new_reference()
+        new_escrow = models.Escrow(
+            request_id=escrow.request_id,
+            amount_inr=escrow.amount_inr,
+            provider_payment_id=reference,
+            status=models.EscrowStatus.pending,
+        )
+        session.add(new_escrow)
+        await session.flush()
+        jobs.enqueue(session, "payment.initiate", {"reference": reference, "amount_inr": escrow.amount_inr})
+        return schemas.EscrowResponse.model_validate(new_escrow).model_dump(mode="json")
+
+    scope = f"user:{user.id} POST /payments/create"
+    try:
+        return await idempotency.run(session, scope, idempotency_key, apply)
+    except IntegrityError:
+        # uq_escrows_active_request: a pending or paid escrow already exists
+        raise HTTPException(status_code=409, detail="An active payment already exists for this request")
+
+
+# -----------------------------
+# Provider webhook
+# -----------------------------
+async def record_event(session: AsyncSession, body: bytes, signature: str | None):
+    event = provider.verify_webhook(body, signature)
+
+    async def apply():
+        jobs.enqueue(session, "payment.event", event)
+        return {"status": "queued"}
+
+    # Providers redeliver webhooks; the event id makes that a replay
+    scope = f"webhook:{provider.name}"
+    return await idempotency.run(session, scope, event["id"], apply, status_code=status.HTTP_202_ACCEPTED)
+
+
+@router.post("/webhook", status_code=status.HTTP_202_ACCEPTED)
+@querycount.budget(3)
+async def payment_webhook(
+    request: Request,
+    x_signature: str | None = Header(None),
+    session: AsyncSession = Depends(db.get_db),
 ):
-    request_obj = session.query(models.Request).filter(models.Request.id == escrow.request_id).first()
-    if not request_obj:
-        raise HTTPException(status_code=404, detail="Request not found")
-
-    user = session.query(models.User).filter(models.User.username == username).first()
-    if request_obj.requester_id != user.id:
-        raise HTTPException(status_code=403, detail="Only requester can create payment")
-    
-    if request_obj.status != models.RequestStatus.accepted:
-        raise HTTPException(status_code=403, detail="Payment can only be created after traveler accepts the request")
-
-    fake_payment_id = f"pay_{uuid.uuid4().hex[:8]}"
-    new_escrow = models.Escrow(
-        request_id=escrow.request_id,
-        amount_inr=escrow.amount_inr,
-        provider_payment_id=fake_payment_id,
-        status=models.EscrowStatus.paid  # simulate instant success
+    return await record_event(session, await request.body(), x_signature)
+
+
+async def deliver_event(body: bytes, signature: str):
+    # In-process delivery for the simulator, same path as the HTTP webhook
+    async with db.AsyncSessionLocal() as session:
+        await record_event(session, body, signature)
+
+
+provider.deliver = deliver_event
+
+
+# -----------------------------
+# Job handlers
+# -----------------------------
+@jobs.handler("payment.initiate")
+async def initiate_payment(session: AsyncSession, payload: dict):
+    await provider.create_payment(payload["reference"], payload["amount_inr"])
+
+
+@jobs.handler("payment.event")
+async def apply_payment_event(session: AsyncSession, event: dict):
+    target = EVENT_TARGETS.get(event.get("type"))
+    if target is None:
+        logger.info("ignoring payment event %s of type %s", event.get("id"), event.get("type"))
+        return
+    escrow_id = await session.scalar(
+        select(models.Escrow.id).where(models.Escrow.provider_payment_id == event["reference"])
     )
-    session.add(new_escrow)
-    session.commit()
-    session.refresh(new_escrow)
-    return new_escrow
+    if escrow_id is None:
+        raise LookupError(f"no escrow for payment reference {event['reference']!r}")
+    try:
+        await transitions.transition_escrow(session, escrow_id, target)
+    except HTTPException as exc:
+        if exc.status_code != status.HTTP_409_CONFLICT:
+            raise
+        # The escrow has already moved on (e.g. failed after it was paid); retrying cannot change that
+        logger.warning("ignoring payment event %s for escrow %s: %s", event.get("id"), escrow_id, exc.detail)
+
+
+# -----------------------------
+# Release / refund
+# -----------------------------
+async def change_escrow_status(session, escrow_id, target, user, idempotency_key, if_match):
+    async def apply():
+        escrow = await transitions.transition_escrow(
+            session, escrow_id, target, actor_id=user.id, expected_version=transitions.parse_if_match(if_match)
+        )
+        return schemas.EscrowResponse.model_validate(escrow).model_dump(mode="json")
+
+    action = "release" if target == models.EscrowStatus.released else "refund"
+    scope = f"user:{user.id} PUT /payments/{escrow_id}/{action}"
+    return await idempotency.run(session, scope, idempotency_key, apply)
 
 
 @router.put("/{escrow_id}/release", response_model=schemas.EscrowResponse)
-def release_payment(
+@querycount.budget(5)
+async def release_payment(
     escrow_id: int,
-    session: Session = Depends(get_db),
-    username: str = Depends(auth.get_current_user),
+    idempotency_key: str | None = Header(None),
+    if_match: str | None = Header(None),
+    session: AsyncSession = Depends(db.get_db),
+    user: auth.Principal = Depends(auth.get_current_user),
 ):
-    escrow = session.query(models.Escrow).filter(models.Escrow.id == escrow_id).first()
-    if not escrow:
-        raise HTTPException(status_code=404, detail="Escrow not found")
-
-    user = session.query(models.User).filter(models.User.username == username).first()
-    if escrow.request.trip.user_id != user.id:
-        raise HTTPException(status_code=403, detail="Only traveler can release funds")
-
-    escrow.status = models.EscrowStatus.released
-    session.commit()
-    session.refresh(escrow)
-    return escrow
+    return await change_escrow_status(
+        session, escrow_id, models.EscrowStatus.released, user, idempotency_key, if_match
+    )
 
 
 @router.put("/{escrow_id}/refund", response_model=schemas.EscrowResponse)
-def refund_payment(
+@querycount.budget(5)
+async def refund_payment(
     escrow_id: int,
-    session: Session = Depends(get_db),
-    username: str = Depends(auth.get_current_user),
+    idempotency_key: str | None = Header(None),
+    if_match: str | None = Header(None),
+    session: AsyncSession = Depends(db.get_db),
+    user: auth.Principal = Depends(auth.get_current_user),
 ):
-    escrow = session.query(models.Escrow).filter(models.Escrow.id == escrow_id).first()
-    if not escrow:
-        raise HTTPException(status_code=404, detail="Escrow not found")
-
-    user = session.query(models.User).filter(models.User.username == username).first()
-    if escrow.request.requester_id != user.id:
-        raise HTTPException(status_code=403, detail="Only requester can refund")
-
-    escrow.status = models.EscrowStatus.refunded
-    session.commit()
-    session.refresh(escrow)
-    return escrow
+    return await change_escrow_status(
+        session, escrow_id, models.EscrowStatus.refunded, user, idempotency_key, if_match
+    )
@@ -0,0 +1,90 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import uuid
+from fastapi import HTTPException
+
+
+class PaymentProvider:
+    """Gateway adapter.
+
+    Payments are identified by our own reference (stored as the escrow's
+    provider_payment_id) and confirmed later through signed webhook events
+    of the form {"id", "type", "reference"}.
+    """
+
+    name = "base"
+
+    def new_reference(self) -> str:
+        return f"{self.name}_{uuid.uuid4().hex}"
+
+    async def create_payment(self, reference: str, amount_inr: float):
+        raise NotImplementedError
+
+    def verify_webhook(self, body: bytes, signature: str | None) -> dict:
+        raise NotImplementedError
+
+
+class SimulatorProvider(PaymentProvider):
+    """Local stand-in for a gateway: accepts every payment and reports the
+    outcome through `deliver(body, signature)` after `confirm_delay` seconds."""
+
+    name = "sim"
+
+    def __init__(self, secret: str, latency: float = 0.0, confirm_delay: float = 0.5, outcome: str = "succeeded"):
+        self.secret = secret.encode()
+        self.latency = latency
+        self.confirm_delay = confirm_delay
+        self.outcome = outcome
+        self.deliver = None
+        self._pending = set()
+
+    def sign(self, body: bytes) -> str:
+        return hmac.new(self.secret, body, hashlib.sha256).hexdigest()
+
+    def verify_webhook(self, body: bytes, signature: str | None) -> dict:
+        if not signature or not hmac.compare_digest(self.sign(body), signature):
+            raise HTTPException(status_code=400, detail="Invalid webhook signature")
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid webhook body")
+
+    async def create_payment(self, reference: str, amount_inr: float):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.deliver is not None:
+            task = asyncio.create_task(self._confirm(reference))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _confirm(self, reference: str):
+        await asyncio.sleep(self.confirm_delay)
+        body = json.dumps({
+            "id": f"evt_{uuid.uuid4().hex}",
+            "type": f"payment.{self.outcome}",
+            "reference": reference,
+        }).encode()
+        await self.deliver(body, self.sign(body))
+
+
+PROVIDERS = {
+    "simulator": lambda: SimulatorProvider(
+        secret=os.getenv("PAYMENT_WEBHOOK_SECRET", "dev-webhook-secret"),
+        latency=float(os.getenv("PAYMENT_SIMULATOR_LATENCY", "0")),
+        confirm_delay=float(os.getenv("PAYMENT_SIMULATOR_DELAY", "0.5")),
+        outcome=os.getenv("PAYMENT_SIMULATOR_OUTCOME", "succeeded"),
+    ),
+}
+
+
+def make_provider() -> PaymentProvider:
+    name = os.getenv("PAYMENT_PROVIDER", "simulator")
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown PAYMENT_PROVIDER {name!r}")
+    return PROVIDERS[name]()
+
+
+provider = make_provider()
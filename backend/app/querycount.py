@@ -0,0 +1,74 @@
+import contextvars
+import os
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+
+
+# Fail the request (and so any test client call) when a route runs more
+# queries than it declares. Off by default; test runs set it to 1.
+ENFORCE = os.getenv("QUERY_BUDGET_ENFORCE", "0") == "1"
+
+_counter = contextvars.ContextVar("query_counter", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+
+def _count(conn, cursor, statement, parameters, context, executemany):
+    counter = _counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
+
+
+for _engine in db.sync_engines():
+    event.listen(_engine, "before_cursor_execute", _count)
+
+
+@contextmanager
+def count_queries():
+    """Count the statements executed inside the block (on this task)."""
+    counter = QueryCounter()
+    token = _counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _counter.reset(token)
+
+
+def budget(max_queries: int):
+    """Declare how many queries a route may run, auth lookup included."""
+    def decorator(fn):
+        fn.query_budget = max_queries
+        return fn
+    return decorator
+
+
+class QueryBudgetMiddleware:
+    """ASGI middleware that checks each request against its route's budget."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENFORCE:
+            return await self.app(scope, receive, send)
+
+        with count_queries() as counter:
+            await self.app(scope, receive, send)
+
+        # The router leaves the matched endpoint in the scope
+        allowed = getattr(scope.get("endpoint"), "query_budget", None)
+        if allowed is not None and counter.count > allowed:
+            raise QueryBudgetExceeded(
+                f"{scope['method']} {scope['path']} ran {counter.count} queries, budget is {allowed}:\n"
+                + "\n".join(counter.statements)
+            )
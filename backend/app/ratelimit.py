@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from fastapi import Depends, HTTPException, Request
+from app import auth, db
+
+logger = logging.getLogger(__name__)
+
+ENABLED = db.env_flag("RATE_LIMIT_ENABLED", True)
+# "memory" keeps buckets per process; "postgres" shares them between workers
+BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Only behind a proxy that sets X-Forwarded-For; otherwise clients can spoof it
+TRUST_FORWARDED = db.env_flag("RATE_LIMIT_TRUST_FORWARDED", False)
+PURGE_INTERVAL = float(os.getenv("RATE_LIMIT_PURGE_INTERVAL", "300"))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(spec: str) -> tuple[int, float]:
+    """"10/minute" or "10/60" -> (10 requests, 60 seconds)."""
+    count, _, period = spec.strip().partition("/")
+    seconds = PERIODS.get(period.strip()) or float(period)
+    if int(count) < 1 or seconds <= 0:
+        raise ValueError(f"Invalid rate limit {spec!r}")
+    return int(count), seconds
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+# Buckets are kept as a "theoretical arrival time" (GCRA): the moment the
+# bucket would be full again. It is a token bucket with `burst` tokens
+# refilled every `interval`, stored as one number per key.
+class RateLimitBackend:
+    """Bucket storage behind RateLimit.
+
+    Async so a shared store can implement it for multi-worker deployments.
+    """
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def take(self, key: str, interval: float, burst: int) -> float:
+        """Spend one token; 0 when allowed, else seconds until one is available."""
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets; each uvicorn worker enforces the limit on its own."""
+
+    # Expired buckets dropped per check, so the purge never stalls one request
+    PURGE_BATCH = 8
+
+    def __init__(self, maxsize: int = MAX_KEYS):
+        self.maxsize = maxsize
+        # Least recently used first
+        self._tat = OrderedDict()
+
+    async def take(self, key: str, interval: float, burst: int) -> float:
+        now = time.monotonic()
+        self._purge(now)
+        tat = self._tat.get(key)
+        if tat is None:
+            tat = now
+        else:
+            self._tat.move_to_end(key)
+            tat = max(tat, now)
+        ahead = tat + interval - now - burst * interval
+        if ahead > 0:
+            return ahead
+        if key not in self._tat and len(self._tat) >= self.maxsize:
+            self._tat.popitem(last=False)
+        self._tat[key] = tat + interval
+        return 0.0
+
+    def _purge(self, now: float):
+        # Full buckets hold no state worth keeping; the least recently used
+        # ones are the likeliest to be full, so only the head is looked at
+        for _ in range(self.PURGE_BATCH):
+            if not self._tat:
+                return
+            key, tat = next(iter(self._tat.items()))
+            if tat > now:
+                return
+            del self._tat[key]
+
+
+# Spends the token only if the bucket has one; the outer SELECT still sees
+# the row as it was before the statement, which gives the wait when it is empty
+TAKE = """
+WITH hit AS (
+    INSERT INTO rate_limits AS b (key, tat) VALUES ($1, now() + make_interval(secs => $2))
+    ON CONFLICT (key) DO UPDATE SET tat = greatest(b.tat, now()) + make_interval(secs => $2)
+    WHERE greatest(b.tat, now()) + make_interval(secs => $2) <= now() + make_interval(secs => $2 * $3)
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM hit) AS allowed,
+       (SELECT extract(epoch FROM tat - now()) FROM rate_limits WHERE key = $1) AS ahead
+"""
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """Buckets in the (unlogged) rate_limits table, one round trip per check.
+
+    Runs on its own small asyncpg pool so checks stay outside the request's
+    session and query budget.
+    """
+
+    def __init__(self, dsn: str, pool_size: int = 5):
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self._pool = None
+        self._purge_task = None
+
+    async def start(self):
+        self._purge_task = asyncio.create_task(self._purge_forever())
+
+    async def stop(self):
+        if self._purge_task:
+            self._purge_task.cancel()
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _get_pool(self):
+        import asyncpg
+
+        if self._pool is None:
+            self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=self.pool_size)
+        return self._pool
+
+    async def take(self, key: str, interval: float, burst: int) -> float:
+        import asyncpg
+
+        try:
+            pool = await self._get_pool()
+            row = await pool.fetchrow(TAKE, key, interval, burst)
+        except (OSError, asyncpg.PostgresError):
+            # Fail open: an unreachable limiter should not take logins down with it
+            logger.exception("Rate limit check failed")
+            return 0.0
+        if row["allowed"]:
+            return 0.0
+        return max(float(row["ahead"]) + interval - burst * interval, 0.001)
+
+    async def _purge_forever(self):
+        import asyncpg
+
+        while True:
+            await asyncio.sleep(PURGE_INTERVAL)
+            try:
+                pool = await self._get_pool()
+                await pool.execute("DELETE FROM rate_limits WHERE tat < now()")
+            except (OSError, asyncpg.PostgresError):
+                logger.exception("Rate limit purge failed")
+
+
+def make_backend() -> RateLimitBackend:
+    if BACKEND == "postgres":
+        return PostgresRateLimitBackend("postgresql:" + db.DATABASE_URL.split(":", 1)[1])
+    return InMemoryRateLimitBackend()
+
+
+backend = make_backend()
+
+
+# -----------------------------
+# Limits
+# -----------------------------
+class RateLimit:
+    """A named limit such as "10/minute", overridable with RATE_LIMIT_<NAME>."""
+
+    def __init__(self, name: str, default: str):
+        self.name = name
+        self.configure(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+
+    def configure(self, spec: str):
+        self.burst, period = parse_rate(spec)
+        self.interval = period / self.burst
+
+    async def hit(self, identity: str):
+        if not ENABLED:
+            return
+        retry_after = await backend.take(f"{self.name}:{identity}", self.interval, self.burst)
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+def client_ip(request: Request) -> str:
+    if TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",", 1)[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def per_ip(limit: RateLimit):
+    """Dependency counting requests per client address, for anonymous routes."""
+    async def check(request: Request):
+        await limit.hit(client_ip(request))
+    return check
+
+
+def per_user(limit: RateLimit):
+    """Dependency counting requests per authenticated user."""
+    async def check(user: auth.Principal = Depends(auth.get_current_user)):
+        await limit.hit(f"user:{user.id}")
+    return check
+
+
+login = RateLimit("login", "10/minute")
+signup = RateLimit("signup", "5/hour")
+messages = RateLimit("messages", "30/minute")
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from app import auth, db, models, schemas
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Realtime"])
+
+CHANNEL = "chat_messages"
+# Postgres caps NOTIFY payloads at 8000 bytes; larger events travel by id
+MAX_NOTIFY_BYTES = 7500
+CONNECTION_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "100"))
+# Publishes wait behind a reconnect, so it must not take long
+CONNECT_TIMEOUT = float(os.getenv("REALTIME_CONNECT_TIMEOUT", "2"))
+
+
+# -----------------------------
+# Local connections (per worker)
+# -----------------------------
+class ConnectionHub:
+    """Sockets connected to this worker, keyed by user id."""
+
+    def __init__(self):
+        self.connections = defaultdict(set)
+
+    def connect(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=CONNECTION_QUEUE_SIZE)
+        self.connections[user_id].add(queue)
+        return queue
+
+    def disconnect(self, user_id: int, queue: asyncio.Queue):
+        queues = self.connections.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.connections[user_id]
+
+    def deliver(self, event: dict):
+        for user_id in event["recipients"]:
+            for queue in list(self.connections.get(user_id, ())):
+                try:
+                    queue.put_nowait(event["message"])
+                except asyncio.QueueFull:
+                    # Slow consumer: drop its backlog and tell the socket to
+                    # close, the client resyncs over GET /messages.
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(None)
+
+
+hub = ConnectionHub()
+
+
+# -----------------------------
+# Brokers (fan-out across workers)
+# -----------------------------
+class Broker:
+    """Carries events between workers; each worker hands what it receives to `hub`."""
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, event: dict):
+        raise NotImplementedError
+
+
+class InMemoryBroker(Broker):
+    """Single-process broker, for tests and one-worker deployments."""
+
+    async def publish(self, event: dict):
+        hub.deliver(event)
+
+
+class PostgresBroker(Broker):
+    """LISTEN/NOTIFY on a dedicated asyncpg connection per worker."""
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._publisher = None
+        self._publish_lock = asyncio.Lock()
+        self._listener_task = None
+        self._pending = set()
+
+    async def start(self):
+        self._publish_lock = asyncio.Lock()
+        self._listener_task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self):
+        if self._listener_task:
+            self._listener_task.cancel()
+            # Let the listener close its connection on the way out
+            await asyncio.gather(self._listener_task, return_exceptions=True)
+            self._listener_task = None
+        if self._publisher is not None:
+            await self._publisher.close()
+            self._publisher = None
+
+    async def _connect(self):
+        import asyncpg
+
+        return await asyncio.wait_for(asyncpg.connect(self.dsn), CONNECT_TIMEOUT)
+
+    async def publish(self, event: dict):
+        import asyncpg
+
+        payload = json.dumps(event)
+        if len(payload.encode()) > MAX_NOTIFY_BYTES:
+            payload = json.dumps({"recipients": event["recipients"], "message_id": event["message"]["id"]})
+        # asyncpg runs one query at a time per connection; concurrent
+        # sends queue here instead of failing with InterfaceError
+        async with self._publish_lock:
+            try:
+                if self._publisher is None or self._publisher.is_closed():
+                    self._publisher = await self._connect()
+                await self._publisher.execute("SELECT pg_notify($1, $2)", CHANNEL, payload)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                # Delivery is best effort; clients still catch up through GET /messages
+                logger.exception("Failed to publish realtime event")
+                if self._publisher is not None:
+                    # Broken connections would only hang a graceful close
+                    self._publisher.terminate()
+                    self._publisher = None
+
+    async def _listen_forever(self):
+        import asyncpg
+
+        backoff = 1
+        while True:
+            conn = None
+            try:
+                conn = await self._connect()
+                await conn.add_listener(CHANNEL, self._on_notify)
+                backoff = 1
+                while not conn.is_closed():
+                    await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError):
+                logger.exception("Realtime listener lost its connection")
+            finally:
+                if conn is not None:
+                    conn.terminate()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        event = json.loads(payload)
+        if "message" in event:
+            hub.deliver(event)
+        else:
+            task = asyncio.create_task(self._deliver_by_id(event))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _deliver_by_id(self, event: dict):
+        async with db.AsyncSessionLocal() as session:
+            message = await session.get(models.Message, event["message_id"])
+        if message is not None:
+            hub.deliver({"recipients": event["recipients"], "message": serialize_message(message)})
+
+
+def make_broker() -> Broker:
+    kind = os.getenv("REALTIME_BROKER") or ("postgres" if db.DATABASE_URL.startswith("postgresql") else "memory")
+    if kind == "postgres":
+        return PostgresBroker("postgresql:" + db.DATABASE_URL.split(":", 1)[1])
+    return InMemoryBroker()
+
+
+broker = make_broker()
+
+
+def serialize_message(message: models.Message) -> dict:
+    return schemas.MessageResponse.model_validate(message).model_dump(mode="json")
+
+
+async def publish_message(message: models.Message):
+    """Push a committed message to every socket of both parties."""
+    await broker.publish({
+        "recipients": sorted({message.sender_id, message.receiver_id}),
+        "message": serialize_message(message),
+    })
+
+
+# -----------------------------
+# WebSocket endpoint
+# -----------------------------
+async def _pump(websocket: WebSocket, queue: asyncio.Queue):
+    while True:
+        message = await queue.get()
+        if message is None:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return
+        await websocket.send_json(message)
+
+
+@router.websocket("/ws/messages")
+async def messages_socket(websocket: WebSocket, token: str = Query(...)):
+    # Browsers cannot set headers on a WebSocket, so the JWT comes as ?token=
+    async with db.AsyncSessionLocal() as session:
+        try:
+            user = await auth.authenticate(token, session)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+    await websocket.accept()
+    queue = hub.connect(user.id)
+    sender = asyncio.create_task(_pump(websocket, queue))
+    try:
+        # Nothing is expected from the client; reading just notices disconnects
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        hub.disconnect(user.id, queue)
@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import itertools
+import logging
+import os
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from app import cache, db
+
+logger = logging.getLogger(__name__)
+
+# "round_robin" or "least_connections"
+SELECTION = os.getenv("REPLICA_SELECTION", "round_robin")
+HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))
+HEALTH_TIMEOUT = float(os.getenv("REPLICA_HEALTH_TIMEOUT", "2"))
+# A Postgres replica further behind than this is taken out of rotation
+MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "10"))
+# After a write, the same caller reads from the primary for this long
+PIN_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Zero while the replica has applied everything it received
+LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    def __init__(self, url: str, engine):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = engine
+        self.healthy = True
+        self.active = 0
+        self.lag = None
+
+
+class ReplicaSet:
+    """Picks a healthy replica per read session; None means read from the primary."""
+
+    def __init__(self, replicas: list[Replica], selection: str = SELECTION):
+        self.replicas = replicas
+        self.selection = selection
+        self._turn = itertools.count()
+
+    def choose(self) -> Replica | None:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        # Rotating the start also spreads ties between equally loaded replicas
+        start = next(self._turn) % len(healthy)
+        healthy = healthy[start:] + healthy[:start]
+        if self.selection == "least_connections":
+            return min(healthy, key=lambda replica: replica.active)
+        return healthy[0]
+
+    async def check(self, replica: Replica):
+        async def probe():
+            async with replica.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    return await conn.scalar(LAG_QUERY)
+                await conn.execute(text("SELECT 1"))
+
+        try:
+            lag = await asyncio.wait_for(probe(), HEALTH_TIMEOUT)
+            replica.lag = None if lag is None else float(lag)
+            healthy = replica.lag is None or replica.lag <= MAX_LAG
+        except Exception as exc:
+            if replica.healthy:
+                logger.warning("Replica %s failed its health check: %s", replica.name, exc)
+            healthy = False
+        if healthy != replica.healthy:
+            logger.warning("Replica %s is now %s (lag %s)", replica.name, "up" if healthy else "down", replica.lag)
+        replica.healthy = healthy
+
+    async def health_forever(self, interval: float = HEALTH_INTERVAL):
+        while True:
+            await asyncio.gather(*[self.check(replica) for replica in self.replicas])
+            await asyncio.sleep(interval)
+
+    def status(self) -> list[dict]:
+        return [
+            {"name": r.name, "healthy": r.healthy, "active": r.active, "lag_s": r.lag} for r in self.replicas
+        ]
+
+
+replica_set = ReplicaSet([Replica(url, engine) for url, engine in zip(db.REPLICA_URLS, db.replica_engines)])
+
+# caller -> pinned to the primary; a shared CacheBackend makes pins hold across workers
+pins = cache.LocalCacheBackend(maxsize=int(os.getenv("READ_YOUR_WRITES_SIZE", "100000")), ttl=PIN_SECONDS)
+
+
+def caller(scope) -> str:
+    """Who is reading or writing: their bearer token if any, else their address."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            return "token:" + hashlib.sha256(value).hexdigest()
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+async def get_read_db(request: Request):
+    """Session for read-only routes: a replica unless the caller wrote recently."""
+    replica = pinned = None
+    if replica_set.replicas:
+        pinned = await pins.get(caller(request.scope))
+        if pinned is None:
+            replica = replica_set.choose()
+    if replica is None:
+        async with db.AsyncSessionLocal() as session:
+            # Cached routes read around the cache then, so the caller sees its own write
+            session.info["pinned"] = bool(pinned)
+            yield session
+        return
+    replica.active += 1
+    try:
+        async with db.AsyncSessionLocal(bind=replica.engine) as session:
+            # A lagging replica must not fill the shared cache; it outlives the pin
+            session.info["replica"] = True
+            yield session
+    finally:
+        replica.active -= 1
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware pinning a caller to the primary after each successful write."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not replica_set.replicas:
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                await pins.set(caller(scope), True)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
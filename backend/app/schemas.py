@@ -1,8 +1,20 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import AfterValidator, BaseModel, Field
+from typing import Annotated, Any
+from datetime import datetime, timezone
 from enum import Enum
 
 
+def naive_utc(value: datetime) -> datetime:
+    # Timestamp columns such as travel_date are stored naive (UTC); asyncpg rejects aware values for them
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+# Datetimes from clients ("...Z", "+05:30" or naive UTC), ready to bind against naive columns
+NaiveUTCDatetime = Annotated[datetime, AfterValidator(naive_utc)]
+
+
 # -------------------------
 # User Schemas
 # -------------------------
@@ -42,7 +54,7 @@ class TripBase(BaseModel):
 
 
 class TripCreate(TripBase):
-    pass
+    travel_date: NaiveUTCDatetime
 
 
 class TripResponse(TripBase):
@@ -54,6 +66,34 @@ class TripResponse(TripBase):
     }
 
 
+class TripPage(BaseModel):
+    items: list[TripResponse]
+    next_cursor: str | None = None
+
+
+class TripSearchPage(BaseModel):
+    items: list[TripResponse]
+    next_offset: int | None = None
+
+
+# -------------------------
+# Bulk Schemas
+# -------------------------
+# Items stay raw dicts so one bad item is reported, not a 422 for the batch
+class BulkCreate(BaseModel):
+    items: list[dict[str, Any]] = Field(min_length=1, max_length=1000)
+
+
+class BulkItemError(BaseModel):
+    index: int
+    detail: Any
+
+
+class TripBulkResponse(BaseModel):
+    created: list[TripResponse]
+    errors: list[BulkItemError]
+
+
 # -------------------------
 # Request Schemas
 # -------------------------
@@ -77,12 +117,23 @@ class RequestResponse(RequestBase):
     trip_id: int
     requester_id: int
     status: RequestStatus
+    version: int
 
     model_config = {
         "from_attributes": True
     }
 
 
+class RequestBulkResponse(BaseModel):
+    created: list[RequestResponse]
+    errors: list[BulkItemError]
+
+
+class RequestSearchPage(BaseModel):
+    items: list[RequestResponse]
+    next_offset: int | None = None
+
+
 
 class MessageCreate(BaseModel):
     request_id: int
@@ -100,6 +151,13 @@ class MessageResponse(BaseModel):
     model_config = {
         "from_attributes": True
     }
+
+
+class MessagePage(BaseModel):
+    items: list[MessageResponse]
+    next_cursor: str | None = None  # pass as `since` to poll for newer messages
+    prev_cursor: str | None = None  # pass as `before` to load older ones
+    has_more: bool = False
     
     
     
@@ -108,6 +166,7 @@ class EscrowStatus(str, Enum):
     paid = "paid"
     released = "released"
     refunded = "refunded"
+    failed = "failed"
 
 
 class EscrowCreate(BaseModel):
@@ -122,7 +181,31 @@ class EscrowResponse(BaseModel):
     provider_payment_id: str
     status: EscrowStatus
     created_at: datetime
+    version: int
 
     model_config = {
         "from_attributes": True
-    }
\ No newline at end of file
+    }
+
+
+# -------------------------
+# Dashboard Schemas
+# -------------------------
+class DashboardRequest(RequestResponse):
+    unread_count: int = 0
+    escrow_id: int | None = None
+    escrow_status: EscrowStatus | None = None
+
+
+class DashboardTrip(TripResponse):
+    requests: list[DashboardRequest]
+
+
+class OutgoingRequest(DashboardRequest):
+    trip: TripResponse
+
+
+class DashboardResponse(BaseModel):
+    trips: list[DashboardTrip]
+    outgoing_requests: list[OutgoingRequest]
+    unread_total: int
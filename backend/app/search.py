@@ -0,0 +1,238 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import re
+from collections import Counter
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import db, models, querycount, replicas, schemas
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+# Postgres uses the tsvector/trigram GIN indexes; anything else (SQLite in
+# tests and local runs) searches an in-process trigram index instead.
+BACKEND = os.getenv(
+    "SEARCH_BACKEND", "postgres" if db.ASYNC_DATABASE_URL.startswith("postgresql") else "ngram"
+)
+# Same default as pg_trgm.similarity_threshold
+SIMILARITY_THRESHOLD = float(os.getenv("SEARCH_SIMILARITY_THRESHOLD", "0.3"))
+REFRESH_INTERVAL = float(os.getenv("SEARCH_REFRESH_INTERVAL", "5"))
+REFRESH_LOOKBACK = int(os.getenv("SEARCH_REFRESH_LOOKBACK", "1000"))
+# Spelling variants tried per query word, and term combinations per query
+TERMS_PER_WORD = int(os.getenv("SEARCH_TERMS_PER_WORD", "5"))
+MAX_COMBOS = int(os.getenv("SEARCH_MAX_COMBOS", "25"))
+
+_WORD = re.compile(r"\w+")
+
+
+def tokens(text: str) -> list[str]:
+    return _WORD.findall(text.casefold())
+
+
+def trigrams(word: str) -> set[str]:
+    # pg_trgm pads each word with two spaces in front and one behind
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# -----------------------------
+# In-process index (SQLite)
+# -----------------------------
+class NgramIndex:
+    """Fuzzy word index: trigram -> vocabulary terms, term -> sorted row ids (and a set of them).
+
+    Typos are resolved against the vocabulary (small) rather than the rows
+    (large), which is what keeps a query cheap at 1M rows.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.postings = {}
+        self.members = {}
+        self.grams = {}
+        self.gram_counts = {}
+        self.max_id = 0
+        self.loaded = False
+        self.enabled = BACKEND == "ngram"
+
+    def add(self, row):
+        if self.enabled:
+            for ids in self._add(row):
+                if len(ids) > 1 and ids[-2] > ids[-1]:
+                    ids.sort()
+
+    def add_many(self, rows):
+        # Append everything, then sort the touched postings once; rows often
+        # arrive out of id order and insort would shift big lists per row
+        if not self.enabled:
+            return
+        touched = {}
+        for row in rows:
+            for ids in self._add(row):
+                touched[id(ids)] = ids
+        for ids in touched.values():
+            ids.sort()
+
+    def _add(self, row):
+        """Record `row` under each of its terms; yields postings lists it appended to."""
+        row_id = row.id
+        text = " ".join(value for value in (getattr(row, f) for f in self.fields) if value)
+        for term in set(tokens(text)):
+            ids = self.postings.get(term)
+            if ids is None:
+                ids = self.postings[term] = []
+                self.members[term] = set()
+                term_grams = trigrams(term)
+                self.gram_counts[term] = len(term_grams)
+                for gram in term_grams:
+                    self.grams.setdefault(gram, set()).add(term)
+            members = self.members[term]
+            if row_id not in members:
+                members.add(row_id)
+                ids.append(row_id)
+                yield ids
+        self.max_id = max(self.max_id, row_id)
+
+    def similar_terms(self, word: str):
+        """[(similarity, term)] best first, using pg_trgm's similarity()."""
+        word_grams = trigrams(word)
+        shared = Counter()
+        for gram in word_grams:
+            shared.update(self.grams.get(gram, ()))
+        scored = []
+        for term, common in shared.items():
+            similarity = common / (len(word_grams) + self.gram_counts[term] - common)
+            if similarity >= SIMILARITY_THRESHOLD:
+                scored.append((similarity, term))
+        return sorted(scored, reverse=True)
+
+    def search(self, query: str, count: int) -> list[int]:
+        """Top `count` row ids: every word must match; closer spellings and newer rows first."""
+        candidates = [self.similar_terms(word)[:TERMS_PER_WORD] for word in tokens(query)]
+        if not candidates or not all(candidates):
+            return []
+
+        # Best-scoring term combinations first, so a row is found at its best score
+        combos = heapq.nlargest(
+            MAX_COMBOS, itertools.product(*candidates), key=lambda combo: sum(sim for sim, _ in combo)
+        )
+        found, seen = [], set()
+        for combo in combos:
+            terms = sorted({term for _, term in combo}, key=lambda term: len(self.postings[term]))
+            others = [self.members[term] for term in terms[1:]]
+            # Walk the rarest term newest-first; stops as soon as the page is full
+            for row_id in reversed(self.postings[terms[0]]):
+                if row_id not in seen and all(row_id in rows for rows in others):
+                    seen.add(row_id)
+                    found.append(row_id)
+                    if len(found) == count:
+                        return found
+        return found
+
+    async def load(self):
+        columns = [self.model.id] + [getattr(self.model, f) for f in self.fields]
+        async with db.AsyncSessionLocal() as session:
+            result = await session.stream(select(*columns).execution_options(yield_per=10_000))
+            async for rows in result.partitions():
+                self.add_many(rows)
+        self.loaded = True
+        logger.info("%s search index loaded: %d terms", self.model.__tablename__, len(self.postings))
+
+    async def refresh(self):
+        columns = [self.model.id] + [getattr(self.model, f) for f in self.fields]
+        async with db.AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(*columns).where(self.model.id > self.max_id - REFRESH_LOOKBACK)
+            )).all()
+        self.add_many(rows)
+
+    async def sync_forever(self, interval: float = REFRESH_INTERVAL):
+        while True:
+            try:
+                if self.loaded:
+                    await self.refresh()
+                else:
+                    await self.load()
+            except Exception:
+                logger.exception("%s search index sync failed", self.model.__tablename__)
+            await asyncio.sleep(interval)
+
+
+trip_index = NgramIndex(models.Trip, ("origin", "destination"))
+request_index = NgramIndex(models.Request, ("product_name", "product_description"))
+
+
+# -----------------------------
+# Postgres
+# -----------------------------
+# Must match the index expressions in the search migration, literally, or
+# the planner will not use them
+TRIP_DOCUMENT = literal_column("to_tsvector('simple', origin || ' ' || destination)")
+REQUEST_DOCUMENT = literal_column(
+    "to_tsvector('simple', product_name || ' ' || coalesce(product_description, ''))"
+)
+
+
+def postgres_query(model, document, fuzzy_columns, q: str):
+    tsquery = func.websearch_to_tsquery(literal_column("'simple'"), q)
+    needle = q.strip().lower()
+    lowered = [func.lower(column) for column in fuzzy_columns]
+    score = func.greatest(
+        func.ts_rank(document, tsquery), *[func.similarity(column, needle) for column in lowered]
+    )
+    return (
+        select(model)
+        .where(or_(document.op("@@")(tsquery), *[column.op("%")(needle) for column in lowered]))
+        .order_by(score.desc(), model.id.desc())
+    )
+
+
+async def run_search(session: AsyncSession, index: NgramIndex, query, q: str, offset: int, limit: int):
+    """One page of matches plus the next offset (None on the last page)."""
+    count = offset + limit + 1
+    if BACKEND == "postgres":
+        rows = (await session.scalars(query.offset(offset).limit(limit + 1))).all()
+    else:
+        ids = index.search(q, count)[offset:]
+        by_id = {}
+        if ids:
+            by_id = {
+                row.id: row
+                for row in (await session.scalars(select(index.model).where(index.model.id.in_(ids)))).all()
+            }
+        rows = [by_id[row_id] for row_id in ids if row_id in by_id]
+    next_offset = offset + limit if len(rows) > limit else None
+    return {"items": rows[:limit], "next_offset": next_offset}
+
+
+# -----------------------------
+# Routes
+# -----------------------------
+@router.get("/trips", response_model=schemas.TripSearchPage)
+@querycount.budget(1)
+async def search_trips(
+    q: str = Query(..., min_length=2, max_length=100),
+    offset: int = Query(0, ge=0, le=1000),
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(replicas.get_read_db),
+):
+    query = postgres_query(models.Trip, TRIP_DOCUMENT, [models.Trip.origin, models.Trip.destination], q)
+    return await run_search(session, trip_index, query, q, offset, limit)
+
+
+@router.get("/requests", response_model=schemas.RequestSearchPage)
+@querycount.budget(1)
+async def search_requests(
+    q: str = Query(..., min_length=2, max_length=100),
+    offset: int = Query(0, ge=0, le=1000),
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(replicas.get_read_db),
+):
+    query = postgres_query(models.Request, REQUEST_DOCUMENT, [models.Request.product_name], q)
+    return await run_search(session, request_index, query, q, offset, limit)
@@ -1,7 +1,24 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Pinning min == max == default makes any hash made with a different cost
+# report needs_update, so login can rehash it transparently.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# Worker pool settings; 0 workers runs hashing in the threadpool instead
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_QUEUE_DEPTH = int(os.getenv("PASSWORD_HASH_QUEUE_DEPTH", str(max(HASH_WORKERS, 1) * 4)))
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -9,6 +26,62 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update(plain_password: str, hashed_password: str):
+    """Return (valid, new_hash); new_hash is set when the stored hash uses stale parameters."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+_executor = None
+_pending = 0
+
+
+def get_executor():
+    global _executor
+    if _executor is None and HASH_WORKERS > 0:
+        # spawn: forking a process that runs an event loop and DB pool is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _run(fn, *args):
+    """Run a bcrypt call off the event loop, shedding load once the queue is full."""
+    # Imported here so spawned hash workers, which import this module, skip fastapi
+    from fastapi import HTTPException
+    from fastapi.concurrency import run_in_threadpool
+
+    global _pending
+    if _pending >= max(HASH_WORKERS, 1) + HASH_QUEUE_DEPTH:
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication is busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        executor = get_executor()
+        if executor is None:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def verify_and_update_async(plain_password: str, hashed_password: str):
+    return await _run(verify_and_update, plain_password, hashed_password)
+
 
 # # JWT settings
 # SECRET_KEY = "your_super_secret_key_here"
@@ -0,0 +1,124 @@
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app import models, outbox
+
+# target status -> statuses it may be entered from
+REQUEST_TRANSITIONS = {
+    models.RequestStatus.accepted: {models.RequestStatus.pending},
+    models.RequestStatus.rejected: {models.RequestStatus.pending},
+}
+
+ESCROW_TRANSITIONS = {
+    models.EscrowStatus.paid: {models.EscrowStatus.pending},
+    models.EscrowStatus.released: {models.EscrowStatus.paid},
+    models.EscrowStatus.refunded: {models.EscrowStatus.paid},
+    models.EscrowStatus.failed: {models.EscrowStatus.pending},
+}
+
+
+def parse_if_match(value: str | None) -> int | None:
+    """Read an expected version from an If-Match header ("3", "\"3\"" or W/"3")."""
+    if value is None:
+        return None
+    try:
+        return int(value.removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a version number")
+
+
+def _check_failed(row, target, expected_version, label: str):
+    """Explain why the conditional UPDATE matched nothing; returns the row when it is already there."""
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"{label} not found")
+    if expected_version is not None and row.version != expected_version:
+        raise HTTPException(status_code=412, detail=f"{label} was modified (version {row.version})")
+    if row.status == target:
+        return row
+    raise HTTPException(
+        status_code=409, detail=f"Cannot move {label.lower()} from {row.status.value} to {target.value}"
+    )
+
+
+async def _conditional_update(session, model, row_id, target, sources, expected_version, *guards):
+    # One round trip: the WHERE clause is the state machine check
+    stmt = update(model).where(model.id == row_id, model.status.in_(sources), *guards)
+    if expected_version is not None:
+        stmt = stmt.where(model.version == expected_version)
+    stmt = stmt.values(status=target, version=model.version + 1).returning(model)
+    return (await session.scalars(stmt)).first()
+
+
+async def transition_request(
+    session: AsyncSession,
+    request_id: int,
+    target: models.RequestStatus,
+    expected_version: int | None = None,
+    actor_id: int | None = None,
+) -> models.Request:
+    """Move a request to `target`; `actor_id` must own the trip it was made on."""
+    guards = []
+    if actor_id is not None:
+        guards.append(models.Request.trip_id.in_(select(models.Trip.id).where(models.Trip.user_id == actor_id)))
+
+    req = await _conditional_update(
+        session, models.Request, request_id, target, REQUEST_TRANSITIONS[target], expected_version, *guards
+    )
+    if req is None:
+        req = await session.get(models.Request, request_id, options=[joinedload(models.Request.trip)])
+        if req is not None and actor_id is not None and req.trip.user_id != actor_id:
+            raise HTTPException(status_code=403, detail="Only the traveler can accept or reject this request")
+        return _check_failed(req, target, expected_version, "Request")
+    outbox.emit(session, f"request.{target.value}", {
+        "request_id": req.id,
+        "trip_id": req.trip_id,
+        "requester_id": req.requester_id,
+        "version": req.version,
+    })
+    return req
+
+
+async def transition_escrow(
+    session: AsyncSession,
+    escrow_id: int,
+    target: models.EscrowStatus,
+    actor_id: int | None = None,
+    expected_version: int | None = None,
+) -> models.Escrow:
+    """Move an escrow to `target`; `actor_id` must be the traveler to release, the requester to refund."""
+    guards = []
+    if actor_id is not None:
+        owned = (
+            select(models.Request.id)
+            .join(models.Trip, models.Request.trip_id == models.Trip.id)
+            .where(_actor_column(target) == actor_id)
+        )
+        guards.append(models.Escrow.request_id.in_(owned))
+
+    escrow = await _conditional_update(
+        session, models.Escrow, escrow_id, target, ESCROW_TRANSITIONS[target], expected_version, *guards
+    )
+    if escrow is None:
+        escrow = await session.get(
+            models.Escrow, escrow_id, options=[joinedload(models.Escrow.request).joinedload(models.Request.trip)]
+        )
+        if escrow is not None and actor_id is not None:
+            if target == models.EscrowStatus.released and escrow.request.trip.user_id != actor_id:
+                raise HTTPException(status_code=403, detail="Only traveler can release funds")
+            if target == models.EscrowStatus.refunded and escrow.request.requester_id != actor_id:
+                raise HTTPException(status_code=403, detail="Only requester can refund")
+        return _check_failed(escrow, target, expected_version, "Escrow")
+    outbox.emit(session, f"escrow.{target.value}", {
+        "escrow_id": escrow.id,
+        "request_id": escrow.request_id,
+        "amount_inr": escrow.amount_inr,
+        "version": escrow.version,
+    })
+    return escrow
+
+
+def _actor_column(target):
+    if target == models.EscrowStatus.released:
+        return models.Trip.user_id
+    return models.Request.requester_id
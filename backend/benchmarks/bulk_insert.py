@@ -0,0 +1,74 @@
+"""Rows per second: single-item POST /trips and /requests vs the bulk endpoints.
+
+    python -m benchmarks.bulk_insert --rows 5000 --batch 500
+"""
+import argparse
+import json
+import time
+import uuid
+
+from benchmarks import common
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+
+def auth_headers(client):
+    name = f"bulk_{uuid.uuid4().hex[:8]}"
+    client.post("/signup", json={"username": name, "email": f"{name}@bench.local", "password": "pw"})
+    token = client.post("/login", json={"username": name, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def trip_payload(i):
+    return {
+        "origin": common.CITIES[i % len(common.CITIES)],
+        "destination": common.CITIES[(i + 3) % len(common.CITIES)],
+        "travel_date": f"2027-01-{i % 28 + 1:02d}T10:00:00",
+    }
+
+
+def rate(rows, seconds):
+    return {"rows": rows, "seconds": round(seconds, 3), "rows_per_s": round(rows / seconds, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    common.create_schema()
+    with TestClient(app) as client:
+        headers = auth_headers(client)
+        results = {}
+
+        start = time.perf_counter()
+        trip_ids = [client.post("/trips", json=trip_payload(i), headers=headers).json()["id"] for i in range(args.rows)]
+        results["trips_single"] = rate(args.rows, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for offset in range(0, args.rows, args.batch):
+            items = [trip_payload(i) for i in range(offset, min(offset + args.batch, args.rows))]
+            client.post("/trips/bulk", json={"items": items}, headers=headers)
+        results["trips_bulk"] = rate(args.rows, time.perf_counter() - start)
+
+        def request_payload(i):
+            return {"product_name": f"item {i}", "trip_id": trip_ids[i % len(trip_ids)]}
+
+        start = time.perf_counter()
+        for i in range(args.rows):
+            client.post("/requests", json=request_payload(i), headers=headers)
+        results["requests_single"] = rate(args.rows, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for offset in range(0, args.rows, args.batch):
+            items = [request_payload(i) for i in range(offset, min(offset + args.batch, args.rows))]
+            client.post("/requests/bulk", json={"items": items}, headers=headers)
+        results["requests_bulk"] = rate(args.rows, time.perf_counter() - start)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
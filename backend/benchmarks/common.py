@@ -0,0 +1,231 @@
+"""Shared helpers for the scripts in this folder.
+
+Run every benchmark from the backend folder, e.g.
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.trip_pagination
+
+so `app` is importable. Without DATABASE_URL they default to a local SQLite file.
+"""
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from sqlalchemy import func, insert, update  # noqa: E402
+from app import db, models  # noqa: E402
+
+CITIES = [
+    "Delhi", "Mumbai", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune",
+    "Dubai", "London", "Singapore", "New York", "Toronto", "Sydney", "Frankfurt",
+]
+
+
+PRODUCTS = [
+    "iPhone", "charger", "headphones", "laptop", "perfume", "chocolates", "watch",
+    "camera", "lens", "sneakers", "kindle", "protein", "vitamins", "console", "tablet",
+]
+ADJECTIVES = ["new", "sealed", "used", "black", "white", "wireless", "original", "large", "small"]
+
+# Password of every user seed_users creates
+BENCH_PASSWORD = "bench-password"
+
+
+def percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(pick(0.50), 3),
+        "p95_ms": round(pick(0.95), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def create_schema():
+    """Tables straight from the models, stamped as migrated so the app boots against them."""
+    from alembic import command
+    from alembic.config import Config
+
+    models.Base.metadata.create_all(bind=db.engine)
+    command.stamp(Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini")), "head")
+
+
+def ensure_user(session, username="bench_user"):
+    user = session.query(models.User).filter(models.User.username == username).first()
+    if user:
+        return user
+    user = models.User(username=username, email=f"{username}@bench.local", hashed_password="x")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def seed_users(total, chunk=10_000):
+    """Top up users `seed_<n>` to `total`, all with BENCH_PASSWORD; returns their ids."""
+    from app import security
+
+    session = db.SessionLocal()
+    try:
+        seeded = models.User.username.startswith("seed_", autoescape=True)
+        existing = session.query(func.count(models.User.id)).filter(seeded).scalar()
+        # One bcrypt hash for everyone; hashing per user would dominate seeding
+        hashed = security.hash_password(BENCH_PASSWORD) if existing < total else None
+        for offset in range(existing, total, chunk):
+            session.execute(insert(models.User), [
+                {"username": f"seed_{n}", "email": f"seed_{n}@bench.local", "hashed_password": hashed}
+                for n in range(offset, min(offset + chunk, total))
+            ])
+            session.commit()
+        return [row[0] for row in session.query(models.User.id).filter(seeded).order_by(models.User.id).limit(total)]
+    finally:
+        session.close()
+
+
+def seed_trips(total, chunk=10_000, seed=42, user_ids=None):
+    """Top the trips table up to `total` rows with random routes and dates.
+
+    Owned by `user_ids` at random, or by a single bench user.
+    """
+    rng = random.Random(seed)
+    session = db.SessionLocal()
+    try:
+        user = ensure_user(session) if not user_ids else None
+        existing = session.query(func.count(models.Trip.id)).scalar()
+        start = datetime(2026, 1, 1)
+        for offset in range(existing, total, chunk):
+            rows = []
+            for _ in range(min(chunk, total - offset)):
+                origin, destination = rng.sample(CITIES, 2)
+                rows.append({
+                    "user_id": rng.choice(user_ids) if user_ids else user.id,
+                    "origin": origin,
+                    "destination": destination,
+                    "travel_date": start + timedelta(minutes=rng.randrange(0, 60 * 24 * 365)),
+                })
+            session.execute(insert(models.Trip), rows)
+            session.commit()
+        return total
+    finally:
+        session.close()
+
+
+def seed_requests(total, chunk=10_000, seed=42, user_ids=None, trips=1000):
+    """Top the requests table up to `total` rows spread over the first `trips` trips.
+
+    Requesters are drawn from `user_ids` (never the trip's owner), or are a single bench user.
+    """
+    rng = random.Random(seed)
+    session = db.SessionLocal()
+    try:
+        user = ensure_user(session) if not user_ids else None
+        owners = session.query(models.Trip.id, models.Trip.user_id).order_by(models.Trip.id).limit(trips).all()
+        existing = session.query(func.count(models.Request.id)).scalar()
+        for offset in range(existing, total, chunk):
+            rows = []
+            for _ in range(min(chunk, total - offset)):
+                name = f"{rng.choice(ADJECTIVES)} {rng.choice(PRODUCTS)} {rng.randrange(1, 20)}"
+                trip_id, owner_id = rng.choice(owners)
+                requester_id = user.id if user else rng.choice(user_ids)
+                if requester_id == owner_id and len(user_ids or ()) > 1:
+                    requester_id = user_ids[(user_ids.index(requester_id) + 1) % len(user_ids)]
+                rows.append({
+                    "trip_id": trip_id,
+                    "requester_id": requester_id,
+                    "product_name": name,
+                    "product_description": f"{rng.choice(ADJECTIVES)} {rng.choice(PRODUCTS)}",
+                    "status": models.RequestStatus.pending,
+                })
+            session.execute(insert(models.Request), rows)
+            session.commit()
+        return total
+    finally:
+        session.close()
+
+
+def seed_messages(total, chunk=10_000, seed=42, requests=5000):
+    """Top the messages table up to `total` rows: conversations on the first `requests` requests.
+
+    Senders alternate between requester and traveler; one in ten is left unread.
+    """
+    rng = random.Random(seed)
+    session = db.SessionLocal()
+    try:
+        pairs = (
+            session.query(models.Request.id, models.Request.requester_id, models.Trip.user_id)
+            .join(models.Trip, models.Request.trip_id == models.Trip.id)
+            .order_by(models.Request.id)
+            .limit(requests)
+            .all()
+        )
+        existing = session.query(func.count(models.Message.id)).scalar()
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for offset in range(existing, total, chunk):
+            rows = []
+            for n in range(offset, min(offset + chunk, total)):
+                request_id, requester_id, traveler_id = rng.choice(pairs)
+                sender, receiver = (requester_id, traveler_id) if rng.random() < 0.5 else (traveler_id, requester_id)
+                timestamp = start + timedelta(seconds=n)
+                rows.append({
+                    "request_id": request_id,
+                    "sender_id": sender,
+                    "receiver_id": receiver,
+                    "content": f"{rng.choice(ADJECTIVES)} {rng.choice(PRODUCTS)}, ok?",
+                    "timestamp": timestamp,
+                    "read_at": None if rng.random() < 0.1 else timestamp + timedelta(minutes=5),
+                })
+            session.execute(insert(models.Message), rows)
+            session.commit()
+        return total
+    finally:
+        session.close()
+
+
+def seed_escrows(total, seed=42):
+    """Top the escrows table up to `total`: accepts pending requests and pays for each once."""
+    rng = random.Random(seed)
+    session = db.SessionLocal()
+    try:
+        existing = session.query(func.count(models.Escrow.id)).scalar()
+        if existing >= total:
+            return total
+        request_ids = [
+            row[0] for row in session.query(models.Request.id)
+            .filter(models.Request.status == models.RequestStatus.pending, ~models.Request.escrow.has())
+            .order_by(models.Request.id)
+            .limit(total - existing)
+        ]
+        session.execute(
+            update(models.Request).where(models.Request.id.in_(request_ids)).values(status=models.RequestStatus.accepted)
+        )
+        statuses = [models.EscrowStatus.paid, models.EscrowStatus.released, models.EscrowStatus.refunded]
+        session.execute(insert(models.Escrow), [
+            {
+                "request_id": request_id,
+                "amount_inr": rng.randrange(500, 50_000),
+                "provider_payment_id": f"seed_{request_id}",
+                "status": rng.choices(statuses, weights=[4, 4, 2])[0],
+            }
+            for request_id in request_ids
+        ])
+        session.commit()
+        return total
+    finally:
+        session.close()
@@ -0,0 +1,181 @@
+"""Rows per second on list endpoints: response_model validation vs column tuples + fastjson.
+
+    python -m benchmarks.json_serialization --trips 100000 --limit 200
+
+"serialize" times only the response step, over rows already in memory: ORM
+objects through response_model and JSONResponse (the old path) against
+column tuples through fastjson, for the trips, requests and messages
+schemas. "endpoint" times whole GET /trips pages, query included, against
+a copy of the old route. Bodies are checked to be byte-identical before
+timing. --no-orjson times the stdlib fallback instead.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import common
+
+from fastapi import Depends, FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import db, fastjson, models, pagination, schemas
+from app.main import app
+
+
+def sample_rows(n):
+    """Transient ORM objects shaped like real rows, and the same data as column tuples."""
+    start = datetime(2026, 1, 1)
+    objects = {
+        "trips": [
+            models.Trip(id=i, user_id=1, origin=common.CITIES[i % 14], destination=common.CITIES[(i + 3) % 14],
+                        travel_date=start + timedelta(minutes=i))
+            for i in range(n)
+        ],
+        "requests": [
+            models.Request(id=i, trip_id=i // 3, requester_id=2, product_name=f"{common.PRODUCTS[i % 15]} {i}",
+                           product_description=None if i % 4 else "sealed, original box",
+                           status=models.RequestStatus.pending, version=1)
+            for i in range(n)
+        ],
+        "messages": [
+            models.Message(id=i, request_id=7, sender_id=1 + i % 2, receiver_id=2 - i % 2, content=f"message {i}",
+                           timestamp=datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=i, microseconds=i))
+            for i in range(n)
+        ],
+    }
+    schemas_by_name = {
+        "trips": schemas.TripResponse, "requests": schemas.RequestResponse, "messages": schemas.MessageResponse,
+    }
+    tuples = {
+        name: [tuple(getattr(obj, field) for field in schemas_by_name[name].model_fields) for obj in rows]
+        for name, rows in objects.items()
+    }
+    return objects, tuples, schemas_by_name
+
+
+def build_serialize_app(objects, tuples, schemas_by_name):
+    bench = FastAPI()
+
+    @bench.get("/legacy/trips", response_model=schemas.TripPage)
+    async def legacy_trips():
+        return {"items": objects["trips"], "next_cursor": None}
+
+    @bench.get("/fast/trips")
+    async def fast_trips():
+        items = fastjson.items(tuples["trips"], schemas_by_name["trips"])
+        return fastjson.FastJSONResponse({"items": items, "next_cursor": None})
+
+    @bench.get("/legacy/requests", response_model=list[schemas.RequestResponse])
+    async def legacy_requests():
+        return objects["requests"]
+
+    @bench.get("/fast/requests")
+    async def fast_requests():
+        return fastjson.FastJSONResponse(fastjson.items(tuples["requests"], schemas_by_name["requests"]))
+
+    @bench.get("/legacy/messages", response_model=schemas.MessagePage)
+    async def legacy_messages():
+        return {"items": objects["messages"], "next_cursor": None, "prev_cursor": None, "has_more": False}
+
+    @bench.get("/fast/messages")
+    async def fast_messages():
+        items = fastjson.items(tuples["messages"], schemas_by_name["messages"])
+        return fastjson.FastJSONResponse(
+            {"items": items, "next_cursor": None, "prev_cursor": None, "has_more": False}
+        )
+
+    return bench
+
+
+# What GET /trips did before: ORM objects validated through response_model
+legacy_app = FastAPI()
+
+
+@legacy_app.get("/trips", response_model=schemas.TripPage)
+async def legacy_list_trips(limit: int = 50, session: AsyncSession = Depends(db.get_db)):
+    query = select(models.Trip).order_by(models.Trip.travel_date, models.Trip.id).limit(limit + 1)
+    trips = (await session.scalars(query)).all()
+    next_cursor = None
+    if len(trips) > limit:
+        trips = trips[:limit]
+        next_cursor = pagination.encode_cursor(trips[-1].travel_date, trips[-1].id)
+    return {"items": trips, "next_cursor": next_cursor}
+
+
+async def get(asgi_app, path, query=b""):
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message["body"])
+
+    await asgi_app({
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query, "headers": [], "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }, receive, send)
+    return b"".join(body)
+
+
+async def compare(legacy, fast, rows, requests, rounds):
+    """Alternate the two paths and keep each one's best round, like benchmarks.rate_limit."""
+    legacy_body, fast_body = await legacy(), await fast()
+    assert legacy_body == fast_body, "fast path body differs from the response_model one"
+    per_round = max(1, requests // rounds)
+    best = {"legacy": float("inf"), "fast": float("inf")}
+    for _ in range(rounds):
+        for name, call in (("legacy", legacy), ("fast", fast)):
+            start = time.perf_counter()
+            for _ in range(per_round):
+                await call()
+            best[name] = min(best[name], time.perf_counter() - start)
+    legacy_rps, fast_rps = (rows * per_round / best[name] for name in ("legacy", "fast"))
+    return {
+        "rows_per_response": rows,
+        "bytes_per_response": len(fast_body),
+        "legacy_rows_per_s": round(legacy_rps),
+        "fast_rows_per_s": round(fast_rps),
+        "speedup": round(fast_rps / legacy_rps, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trips", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--no-orjson", action="store_true")
+    args = parser.parse_args()
+    if args.no_orjson:
+        fastjson.orjson = None
+
+    objects, tuples, schemas_by_name = sample_rows(args.limit)
+    bench = build_serialize_app(objects, tuples, schemas_by_name)
+    results = {"encoder": "orjson" if fastjson.orjson else "json", "serialize": {}}
+    for name in objects:
+        results["serialize"][name] = await compare(
+            lambda: get(bench, f"/legacy/{name}"), lambda: get(bench, f"/fast/{name}"),
+            args.limit, args.requests, args.rounds,
+        )
+
+    common.create_schema()
+    common.seed_trips(args.trips)
+    query = f"limit={args.limit}".encode()
+    results["endpoint"] = {
+        "trips": args.trips,
+        "list_trips": await compare(
+            lambda: get(legacy_app, "/trips", query), lambda: get(app, "/trips", query),
+            args.limit, args.requests, args.rounds,
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
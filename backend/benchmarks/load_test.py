@@ -0,0 +1,88 @@
+"""Concurrent-client load test against a running server.
+
+Start the API (e.g. `uvicorn app.main:app --workers 1`), then:
+
+    python -m benchmarks.load_test --url http://localhost:8000 --clients 500 --label after
+
+Run once on the sync build and once on the async build with different
+--label values to get the before/after p50/p99 latencies.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.common import percentiles
+
+
+async def prepare(client):
+    """Create a user and a trip so authenticated and detail routes have data."""
+    name = f"load_{uuid.uuid4().hex[:8]}"
+    await client.post("/signup", json={"username": name, "email": f"{name}@bench.local", "password": "pw"})
+    token = (await client.post("/login", json={"username": name, "password": "pw"})).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    trip = await client.post(
+        "/trips",
+        json={"origin": "Delhi", "destination": "Dubai", "travel_date": "2026-12-01T10:00:00"},
+        headers=headers,
+    )
+    return headers, trip.json()["id"]
+
+
+async def run_client(client, headers, trip_id, deadline, samples):
+    routes = [
+        ("GET /trips", lambda: client.get("/trips", params={"limit": 20})),
+        ("GET /trips/{id}", lambda: client.get(f"/trips/{trip_id}")),
+        ("GET /requests/{trip_id}", lambda: client.get(f"/requests/{trip_id}")),
+        ("POST /requests", lambda: client.post(
+            "/requests", json={"product_name": "load", "trip_id": trip_id}, headers=headers
+        )),
+    ]
+    i = 0
+    while time.perf_counter() < deadline:
+        name, call = routes[i % len(routes)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await call()
+            ok = response.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        samples[name if ok else f"{name} (error)"].append((time.perf_counter() - start) * 1000)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--label", default="run")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        headers, trip_id = await prepare(client)
+        samples = defaultdict(list)
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*[
+            run_client(client, headers, trip_id, deadline, samples) for _ in range(args.clients)
+        ])
+
+    total = sum(len(v) for v in samples.values())
+    report = {
+        "label": args.label,
+        "clients": args.clients,
+        "duration_s": args.duration,
+        "requests_per_s": round(total / args.duration, 1),
+        "overall": percentiles([s for v in samples.values() for s in v]),
+        "routes": {name: percentiles(v) for name, v in sorted(samples.items())},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""Per-request cost of MetricsMiddleware, without HTTP or the database.
+
+    python -m benchmarks.metrics_overhead --requests 200000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import common  # noqa: F401  (sets a local DATABASE_URL)
+from app.metrics import MetricsMiddleware
+
+
+class FakeRoute:
+    path = "/trips/{trip_id}"
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = FakeRoute
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        await app({"type": "http", "method": "GET", "path": "/trips/1"}, receive, send)
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    instrumented = MetricsMiddleware(endpoint)
+    await drive(instrumented, 1000)  # warm up
+    bare = await drive(endpoint, args.requests)
+    measured = await drive(instrumented, args.requests)
+    print(json.dumps({
+        "requests": args.requests,
+        "bare_us_per_request": round(bare / args.requests * 1e6, 3),
+        "instrumented_us_per_request": round(measured / args.requests * 1e6, 3),
+        "overhead_us_per_request": round((measured - bare) / args.requests * 1e6, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""Per-request cost of the rate limiter, without HTTP or the database.
+
+    python -m benchmarks.rate_limit --requests 200000
+
+Drives two otherwise identical FastAPI routes over ASGI, one behind
+ratelimit.per_ip, with requests spread over --clients addresses. The
+target is under 50 µs of overhead per request; nearly all of it is
+FastAPI resolving one more dependency, the bucket itself is ~1 µs. --backend postgres also
+times the shared backend against DATABASE_URL (one round trip per check).
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import common
+from fastapi import Depends, FastAPI
+from app import db, ratelimit
+
+
+def build_app(limit):
+    app = FastAPI()
+
+    @app.get("/plain")
+    async def plain():
+        return {}
+
+    @app.get("/limited", dependencies=[Depends(ratelimit.per_ip(limit))])
+    async def limited():
+        return {}
+
+    return app
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, path, n, clients):
+    start = time.perf_counter()
+    for i in range(n):
+        await app({
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+            "query_string": b"", "headers": [], "client": (f"10.0.{i % clients // 256}.{i % 256}", 1234),
+            "server": ("testserver", 80),
+        }, receive, send)
+    return time.perf_counter() - start
+
+
+async def time_backend(backend, n, clients):
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        await backend.take(f"bench:{i % clients}", 0.001, 1_000_000)
+        samples.append((time.perf_counter() - start) * 1000)
+    return common.percentiles(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--backend", choices=["memory", "postgres"], default="memory")
+    args = parser.parse_args()
+
+    # Generous enough that every request is allowed and takes the full path
+    limit = ratelimit.RateLimit("bench", "1000000/1")
+    app = build_app(limit)
+    await drive(app, "/limited", 1000, args.clients)  # warm up
+    # Alternate the two routes and keep each one's best round, so drift in
+    # machine load does not land on only one side of the comparison
+    per_round = args.requests // args.rounds
+    bare = measured = float("inf")
+    for _ in range(args.rounds):
+        bare = min(bare, await drive(app, "/plain", per_round, args.clients))
+        measured = min(measured, await drive(app, "/limited", per_round, args.clients))
+    bare, measured = bare * args.rounds, measured * args.rounds
+    overhead_us = (measured - bare) / args.requests * 1e6
+    results = {
+        "requests": args.requests,
+        "clients": args.clients,
+        "bare_us_per_request": round(bare / args.requests * 1e6, 3),
+        "limited_us_per_request": round(measured / args.requests * 1e6, 3),
+        "overhead_us_per_request": round(overhead_us, 3),
+        "under_50us": overhead_us < 50,
+        "memory_take": await time_backend(ratelimit.InMemoryRateLimitBackend(), args.requests, args.clients),
+    }
+    if args.backend == "postgres":
+        backend = ratelimit.PostgresRateLimitBackend("postgresql:" + db.DATABASE_URL.split(":", 1)[1])
+        results["postgres_take"] = await time_backend(backend, min(args.requests, 20_000), args.clients)
+        await backend.stop()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""Latency of GET /search/* queries at 1M rows.
+
+    python -m benchmarks.search --rows 1000000
+
+On SQLite this measures the in-process n-gram index (build time included);
+with a postgresql DATABASE_URL it measures the tsvector/trigram queries, so
+run the search migration first.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import common
+
+from app import db, search
+
+QUERIES = {
+    "trips": ["Banglore", "delhi", "new yorkk", "dubai london", "Frankfurt"],
+    "requests": ["iphone", "headphnes", "wireless charger", "sealed perfume 7", "kindel"],
+}
+
+
+async def measure(repeat, limit):
+    indexes = {"trips": search.trip_index, "requests": search.request_index}
+    models = {"trips": search.models.Trip, "requests": search.models.Request}
+    documents = {"trips": search.TRIP_DOCUMENT, "requests": search.REQUEST_DOCUMENT}
+    fuzzy = {
+        "trips": [search.models.Trip.origin, search.models.Trip.destination],
+        "requests": [search.models.Request.product_name],
+    }
+    results = {"backend": search.BACKEND}
+
+    if search.BACKEND == "ngram":
+        for name, index in indexes.items():
+            start = time.perf_counter()
+            await index.load()
+            results[f"{name}_index_build_s"] = round(time.perf_counter() - start, 2)
+            results[f"{name}_index_terms"] = len(index.postings)
+
+    async with db.AsyncSessionLocal() as session:
+        for name, queries in QUERIES.items():
+            for q in queries:
+                query = search.postgres_query(models[name], documents[name], fuzzy[name], q)
+                samples = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    page = await search.run_search(session, indexes[name], query, q, 0, limit)
+                    samples.append((time.perf_counter() - start) * 1000)
+                results[f"{name}: {q}"] = {"hits": len(page["items"]), **common.percentiles(samples)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    common.create_schema()
+    common.seed_trips(args.rows)
+    common.seed_requests(args.rows)
+
+    print(json.dumps(asyncio.run(measure(args.repeat, args.limit)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
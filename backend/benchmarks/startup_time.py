@@ -0,0 +1,96 @@
+"""Worker cold start: importing app.main and running its startup, in fresh processes.
+
+    python -m benchmarks.startup_time --runs 7 --budget-ms 1500
+
+Each run is a new interpreter, like a new uvicorn worker. Also reports what
+the old import-time create_all cost against the same database and the
+slowest modules from -X importtime. Exits 1 when the median import time is
+over --budget-ms, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks import common
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(boot())
+from app import db, models
+legacy = time.perf_counter()
+models.Base.metadata.create_all(bind=db.engine)
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "create_all_ms": (time.perf_counter() - legacy) * 1000,
+}))
+"""
+
+
+def run_child(args=()):
+    out = subprocess.run(
+        [sys.executable, *args, "-c", CHILD], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return out
+
+
+def slowest_modules(count):
+    """The slowest of app.main's direct imports, by cumulative -X importtime."""
+    rows = []
+    for line in run_child(["-X", "importtime"]).stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Children are printed before their parent, one space plus two per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == "app.main":
+                break
+            rows = []
+        elif depth == 1:
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return [{"module": name, "cumulative_ms": round(ms, 1)} for ms, name in sorted(rows, reverse=True)[:count]]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    common.create_schema()
+    runs = [json.loads(run_child().stdout.splitlines()[-1]) for _ in range(args.runs)]
+    medians = {key: round(statistics.median(run[key] for run in runs), 1) for key in runs[0]}
+    results = {
+        "runs": args.runs,
+        "median_import_ms": medians["import_ms"],
+        "median_startup_ms": medians["startup_ms"],
+        "median_ready_ms": round(medians["import_ms"] + medians["startup_ms"], 1),
+        # What every worker used to pay at import, before the revision check replaced it
+        "median_legacy_create_all_ms": medians["create_all_ms"],
+        "budget_ms": args.budget_ms,
+        "within_budget": medians["import_ms"] <= args.budget_ms,
+        "slowest_imports": slowest_modules(args.top),
+    }
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,563 @@
+"""End-to-end load test of the routes in main.py and payments.py against a seeded database.
+
+    python -m benchmarks.suite run --clients 50 --duration 60 --label before --output before.json
+    python -m benchmarks.suite run --clients 50 --duration 60 --label after --output after.json
+    python -m benchmarks.suite compare before.json after.json --threshold 10
+
+`run` recreates the tables in DATABASE_URL, seeds them at the requested
+scale (--users, --trips, --requests, --messages, --escrows), boots uvicorn
+on a free local port with the same environment, and has --clients virtual
+users pick weighted flows for --duration seconds. A flow is what one
+screen of the frontend does: browse trips, search, sign up and log in,
+post trips, ask for a delivery and accept it, message, pay and release or
+refund, open the dashboard, or scrape the ops endpoints. The report has
+throughput, latency percentiles and status counts per endpoint.
+
+The harness plays the payment gateway: it signs the webhooks itself, so
+the booted server runs the simulator with its own confirmation turned off.
+Rate limits are off too, since every virtual user shares one address.
+
+`compare` lines up two reports and exits 1 when an endpoint's p95 rose or
+its throughput fell by more than --threshold percent, or its error rate
+went up by more than --max-error-increase points.
+
+Everything stays on this machine. Pass --url to drive a server you started
+yourself instead; `seed` prepares its database without running anything.
+The harness shares the box with the server, so compare runs made with the
+same --clients and --workers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from benchmarks import common
+
+import httpx
+from sqlalchemy import func
+from app import auth, db, models
+from app.providers import provider
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+# flow -> weight; --mix takes one of these names or "flow=weight,..."
+MIXES = {
+    "default": {
+        "browse": 30, "search": 10, "dashboard": 10, "messaging": 20, "requests": 10,
+        "trips": 5, "bulk": 1, "payments": 5, "auth": 2, "ops": 2,
+    },
+    "read": {"browse": 55, "search": 20, "dashboard": 20, "ops": 5},
+    "write": {"messaging": 30, "requests": 25, "trips": 15, "payments": 15, "bulk": 5, "auth": 10},
+}
+
+BULK_SIZE = 20
+# How long a payment flow waits for the job worker to apply the webhook
+PAYMENT_TIMEOUT = 15.0
+
+
+# -----------------------------
+# Seeding
+# -----------------------------
+def seed(args):
+    if not args.keep_data:
+        models.Base.metadata.drop_all(bind=db.engine)
+    common.create_schema()
+    user_ids = common.seed_users(args.users)
+    common.seed_trips(args.trips, user_ids=user_ids)
+    common.seed_requests(args.requests, user_ids=user_ids, trips=min(args.trips, 5000))
+    common.seed_messages(args.messages)
+    common.seed_escrows(args.escrows)
+
+
+class World:
+    """Seeded ids the flows pick from, read once before the run."""
+
+    def __init__(self, sample=5000):
+        with db.SessionLocal() as session:
+            self.users = dict(
+                session.query(models.User.id, models.User.username)
+                .filter(models.User.username.startswith("seed_", autoescape=True))
+                .all()
+            )
+            self.trips = (
+                session.query(models.Trip.id, models.Trip.user_id, models.Trip.origin, models.Trip.destination)
+                .order_by(func.random())
+                .limit(sample)
+                .all()
+            )
+            # seed_messages writes to the first requests, so these have history
+            self.conversations = (
+                session.query(models.Request.id, models.Request.requester_id, models.Trip.user_id)
+                .join(models.Trip, models.Request.trip_id == models.Trip.id)
+                .order_by(models.Request.id)
+                .limit(sample)
+                .all()
+            )
+        if not self.users or not self.trips or not self.conversations:
+            raise SystemExit("Nothing seeded: run `python -m benchmarks.suite seed` or drop --no-seed")
+        self.user_ids = list(self.users)
+        self.tokens = {}
+
+    def headers(self, user_id):
+        # Tokens are signed here rather than fetched, so setup does no bcrypt
+        token = self.tokens.get(user_id)
+        if token is None:
+            token = self.tokens[user_id] = auth.create_access_token({"sub": self.users[user_id]})
+        return {"Authorization": f"Bearer {token}"}
+
+
+# -----------------------------
+# Recording
+# -----------------------------
+class Recorder:
+    def __init__(self):
+        self.recording = False
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.flows = Counter()
+
+    def record(self, name, status, elapsed_ms):
+        if self.recording:
+            self.samples[name].append(elapsed_ms)
+            self.statuses[name][status] += 1
+
+    def flow(self, name):
+        if self.recording:
+            self.flows[name] += 1
+
+
+class VirtualUser:
+    def __init__(self, client, world, recorder, rng):
+        self.client = client
+        self.world = world
+        self.recorder = recorder
+        self.rng = rng
+
+    async def call(self, method, route, path=None, as_user=None, headers=None, **kwargs):
+        """One request, recorded under "<METHOD> <route>"; None when it failed."""
+        if as_user is not None:
+            headers = {**self.world.headers(as_user), **(headers or {})}
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, route.format(**(path or {})), headers=headers, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, "error"
+        self.recorder.record(f"{method} {route}", status, (time.perf_counter() - start) * 1000)
+        if response is None or response.status_code >= 400:
+            return None
+        return response
+
+    def user(self, exclude=None):
+        while True:
+            user_id = self.rng.choice(self.world.user_ids)
+            if user_id != exclude or len(self.world.user_ids) == 1:
+                return user_id
+
+    def trip(self):
+        return self.rng.choice(self.world.trips)
+
+    def new_trip(self):
+        origin, destination = self.rng.sample(common.CITIES, 2)
+        travel_date = datetime.utcnow() + timedelta(days=self.rng.randrange(1, 90), minutes=self.rng.randrange(1440))
+        return {"origin": origin, "destination": destination, "travel_date": travel_date.isoformat()}
+
+    def product(self):
+        return {
+            "product_name": f"{self.rng.choice(common.ADJECTIVES)} {self.rng.choice(common.PRODUCTS)}",
+            "product_description": "bench",
+        }
+
+
+# -----------------------------
+# Flows
+# -----------------------------
+async def browse(vu):
+    trip = vu.trip()
+    params = {"limit": 20}
+    if vu.rng.random() < 0.5:
+        params.update(origin=trip.origin, destination=trip.destination)
+    await vu.call("GET", "/trips", params=params)
+    await vu.call("GET", "/trips/{trip_id}", path={"trip_id": trip.id})
+    await vu.call("GET", "/requests/{trip_id}", path={"trip_id": trip.id})
+    await vu.call("GET", "/trips/match", params={"origin": trip.origin, "destination": trip.destination})
+
+
+async def search(vu):
+    await vu.call("GET", "/search/trips", params={"q": vu.rng.choice(common.CITIES)})
+    await vu.call("GET", "/search/requests", params={"q": vu.rng.choice(common.PRODUCTS)})
+
+
+async def signup_login(vu):
+    name = f"vu_{uuid.uuid4().hex[:12]}"
+    credentials = {"username": name, "password": common.BENCH_PASSWORD}
+    if await vu.call("POST", "/signup", json={**credentials, "email": f"{name}@bench.local"}):
+        await vu.call("POST", "/login", json=credentials)
+
+
+async def post_trip(vu):
+    response = await vu.call("POST", "/trips", as_user=vu.user(), json=vu.new_trip())
+    if response:
+        await vu.call("GET", "/trips/{trip_id}", path={"trip_id": response.json()["id"]})
+
+
+async def bulk(vu):
+    user_id = vu.user()
+    await vu.call("POST", "/trips/bulk", as_user=user_id, json={"items": [vu.new_trip() for _ in range(BULK_SIZE)]})
+    items = [{**vu.product(), "trip_id": vu.trip().id} for _ in range(BULK_SIZE)]
+    await vu.call("POST", "/requests/bulk", as_user=user_id, json={"items": items})
+
+
+async def request_delivery(vu, accept_ratio=0.75):
+    """A requester asks to have something carried and the traveler answers.
+
+    Returns (request id, trip, requester) when the request was accepted.
+    """
+    trip = vu.trip()
+    requester = vu.user(exclude=trip.user_id)
+    response = await vu.call("POST", "/requests", as_user=requester, json={**vu.product(), "trip_id": trip.id})
+    if not response:
+        return None
+    request_id = response.json()["id"]
+    accepted = vu.rng.random() < accept_ratio
+    route = "/requests/{request_id}/accept" if accepted else "/requests/{request_id}/reject"
+    response = await vu.call("PUT", route, path={"request_id": request_id}, as_user=trip.user_id)
+    await vu.call("GET", "/requests/{trip_id}", path={"trip_id": trip.id}, as_user=requester)
+    return (request_id, trip, requester) if response and accepted else None
+
+
+async def requests(vu):
+    await request_delivery(vu)
+
+
+async def messaging(vu):
+    request_id, requester, traveler = vu.rng.choice(vu.world.conversations)
+    sender, reader = (requester, traveler) if vu.rng.random() < 0.5 else (traveler, requester)
+    path = {"request_id": request_id}
+    await vu.call("POST", "/messages", as_user=sender, json={"request_id": request_id, "content": "on my way"})
+    await vu.call("GET", "/messages/{request_id}", path=path, as_user=reader, params={"limit": 50})
+    await vu.call("PUT", "/messages/{request_id}/read", path=path, as_user=reader)
+
+
+async def payments(vu):
+    deal = await request_delivery(vu, accept_ratio=1)
+    if deal is None:
+        return
+    request_id, trip, requester = deal
+    response = await vu.call(
+        "POST", "/payments/create", as_user=requester,
+        headers={"Idempotency-Key": uuid.uuid4().hex},
+        json={"request_id": request_id, "amount_inr": vu.rng.randrange(500, 50_000)},
+    )
+    if not response:
+        return
+    escrow = response.json()
+    body = json.dumps({
+        "id": f"evt_{uuid.uuid4().hex}", "type": "payment.succeeded", "reference": escrow["provider_payment_id"],
+    }).encode()
+    await vu.call(
+        "POST", "/payments/webhook", content=body,
+        headers={"X-Signature": provider.sign(body), "Content-Type": "application/json"},
+    )
+
+    # The job worker applies the event; the requester's dashboard shows when
+    deadline = time.perf_counter() + PAYMENT_TIMEOUT
+    while True:
+        response = await vu.call("GET", "/me/dashboard", as_user=requester)
+        outgoing = response.json()["outgoing_requests"] if response else []
+        if any(item["id"] == request_id and item["escrow_status"] == "paid" for item in outgoing):
+            break
+        if time.perf_counter() > deadline:
+            vu.recorder.flow("payments (timed out)")
+            return
+        await asyncio.sleep(0.25)
+
+    path = {"escrow_id": escrow["id"]}
+    if vu.rng.random() < 0.8:
+        await vu.call("PUT", "/payments/{escrow_id}/release", path=path, as_user=trip.user_id)
+    else:
+        await vu.call("PUT", "/payments/{escrow_id}/refund", path=path, as_user=requester)
+
+
+async def dashboard(vu):
+    await vu.call("GET", "/me/dashboard", as_user=vu.user())
+
+
+async def ops(vu):
+    for route in ("/ping", "/db/pool", "/cache/stats", "/metrics"):
+        await vu.call("GET", route)
+
+
+FLOWS = {
+    "browse": browse, "search": search, "auth": signup_login, "trips": post_trip, "bulk": bulk,
+    "requests": requests, "messaging": messaging, "payments": payments, "dashboard": dashboard, "ops": ops,
+}
+
+
+def parse_mix(value):
+    if value in MIXES:
+        return MIXES[value]
+    try:
+        mix = {name: float(weight) for name, weight in (part.split("=") for part in value.split(","))}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected one of {sorted(MIXES)} or flow=weight,...")
+    unknown = set(mix) - set(FLOWS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown flows {sorted(unknown)}; known: {sorted(FLOWS)}")
+    return mix
+
+
+# -----------------------------
+# Run
+# -----------------------------
+def start_server(workers, log_path=None):
+    """uvicorn on a free local port; returns (process, url, log file)."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = {**os.environ, "RATE_LIMIT_ENABLED": "0", "PAYMENT_SIMULATOR_DELAY": "86400"}
+    log = open(log_path, "w+b") if log_path else tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while True:
+        if process.poll() is not None:
+            log.seek(0)
+            raise SystemExit(f"Server exited during startup:\n{log.read().decode()[-4000:]}")
+        try:
+            if httpx.get(f"{url}/ping", timeout=1).status_code == 200:
+                return process, url, log
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            process.terminate()
+            raise SystemExit("Server did not answer /ping within 60s")
+        time.sleep(0.2)
+
+
+async def run_client(vu, mix, deadline):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = vu.rng.choices(names, weights)[0]
+        await FLOWS[name](vu)
+        vu.recorder.flow(name)
+
+
+async def drive(url, world, mix, args):
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        deadline = start + args.warmup + args.duration
+
+        async def start_recording():
+            await asyncio.sleep(args.warmup)
+            recorder.recording = True
+
+        await asyncio.gather(start_recording(), *[
+            run_client(VirtualUser(client, world, recorder, random.Random(f"{args.seed}:{i}")), mix, deadline)
+            for i in range(args.clients)
+        ])
+    return recorder
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def build_report(recorder, args, mix):
+    def errors(statuses):
+        return sum(count for status, count in statuses.items() if status == "error" or status >= 500)
+
+    endpoints = {}
+    for name in sorted(recorder.samples):
+        statuses = recorder.statuses[name]
+        endpoints[name] = {
+            **common.percentiles(recorder.samples[name]),
+            "requests_per_s": round(len(recorder.samples[name]) / args.duration, 2),
+            "errors": errors(statuses),
+            "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        }
+    all_samples = [sample for samples in recorder.samples.values() for sample in samples]
+    return {
+        "label": args.label,
+        "config": {
+            "mix": mix,
+            "clients": args.clients,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "workers": args.workers if not args.url else None,
+            "scale": {key: getattr(args, key) for key in ("users", "trips", "requests", "messages", "escrows")},
+            "database": db.engine.dialect.name,
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "requests_per_s": round(len(all_samples) / args.duration, 2),
+        "overall": {
+            **(common.percentiles(all_samples) if all_samples else {"count": 0}),
+            "errors": sum(errors(statuses) for statuses in recorder.statuses.values()),
+        },
+        "flows": dict(sorted(recorder.flows.items())),
+        "endpoints": endpoints,
+    }
+
+
+def run(args):
+    if not args.no_seed:
+        seed(args)
+    world = World()
+    process = log = None
+    url = args.url
+    if not url:
+        process, url, log = start_server(args.workers, args.server_log)
+    try:
+        recorder = asyncio.run(drive(url, world, args.mix, args))
+    finally:
+        if process:
+            process.terminate()
+            process.wait(30)
+            log.close()
+    report = build_report(recorder, args, args.mix)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+# -----------------------------
+# Compare
+# -----------------------------
+def change_pct(before, after):
+    if not before:
+        return None
+    return round((after - before) / before * 100, 1)
+
+
+def error_rate(entry):
+    return entry["errors"] / entry["count"] * 100 if entry.get("count") else 0.0
+
+
+def compare_entries(before, after, args):
+    """Deltas for one endpoint (or the overall row) and what regressed."""
+    row = {
+        key: {"base": before.get(key), "new": after.get(key), "change_pct": change_pct(before.get(key), after.get(key))}
+        for key in ("requests_per_s", "p50_ms", "p95_ms", "p99_ms")
+        if key in before and key in after
+    }
+    row["error_rate_pct"] = {"base": round(error_rate(before), 2), "new": round(error_rate(after), 2)}
+    regressed = []
+    if min(before.get("count", 0), after.get("count", 0)) >= args.min_count:
+        if (row["p95_ms"]["change_pct"] or 0) > args.threshold:
+            regressed.append("p95")
+        if (row["requests_per_s"]["change_pct"] or 0) < -args.threshold:
+            regressed.append("throughput")
+        if error_rate(after) - error_rate(before) > args.max_error_increase:
+            regressed.append("errors")
+    row["regressed"] = regressed
+    return row
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    base["overall"]["requests_per_s"] = base["requests_per_s"]
+    new["overall"]["requests_per_s"] = new["requests_per_s"]
+    endpoints = {}
+    for name in sorted(set(base["endpoints"]) | set(new["endpoints"])):
+        if name not in base["endpoints"] or name not in new["endpoints"]:
+            endpoints[name] = {"only_in": "base" if name in base["endpoints"] else "new"}
+            continue
+        endpoints[name] = compare_entries(base["endpoints"][name], new["endpoints"][name], args)
+    overall = compare_entries(base["overall"], new["overall"], args)
+    regressions = {name: row["regressed"] for name, row in endpoints.items() if row.get("regressed")}
+    if overall["regressed"]:
+        regressions["overall"] = overall["regressed"]
+
+    differences = [
+        key for key in ("mix", "clients", "duration_s", "workers", "scale", "database", "cpus")
+        if base["config"].get(key) != new["config"].get(key)
+    ]
+    print(json.dumps({
+        "base": {"label": base["label"], "git": base["config"].get("git")},
+        "new": {"label": new["label"], "git": new["config"].get("git")},
+        # Different settings make the numbers hard to compare
+        "config_differences": differences,
+        "threshold_pct": args.threshold,
+        "overall": overall,
+        "endpoints": endpoints,
+        "regressions": regressions,
+    }, indent=2))
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scale = argparse.ArgumentParser(add_help=False)
+    scale.add_argument("--users", type=int, default=1000)
+    scale.add_argument("--trips", type=int, default=20_000)
+    scale.add_argument("--requests", type=int, default=50_000)
+    scale.add_argument("--messages", type=int, default=200_000)
+    scale.add_argument("--escrows", type=int, default=2000)
+    scale.add_argument("--keep-data", action="store_true", help="top the tables up instead of recreating them")
+
+    commands.add_parser("seed", parents=[scale])
+
+    run_parser = commands.add_parser("run", parents=[scale])
+    run_parser.add_argument("--no-seed", action="store_true", help="use the database as it is")
+    run_parser.add_argument("--url", help="drive this server instead of booting one")
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--server-log", help="keep the booted server's output here")
+    run_parser.add_argument("--clients", type=int, default=50)
+    run_parser.add_argument("--duration", type=float, default=60.0)
+    run_parser.add_argument("--warmup", type=float, default=5.0)
+    run_parser.add_argument("--mix", type=parse_mix, default="default")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--label", default="run")
+    run_parser.add_argument("--output")
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=10.0)
+    compare_parser.add_argument("--max-error-increase", type=float, default=1.0, help="percentage points")
+    compare_parser.add_argument("--min-count", type=int, default=30, help="ignore endpoints with fewer samples")
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        seed(args)
+    elif args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
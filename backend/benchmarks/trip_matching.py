@@ -0,0 +1,119 @@
+"""Route index build time, memory and match latency against a DB route query.
+
+    python -m benchmarks.trip_matching --trips 1000000 --qps 10000
+
+Synthetic trips go straight into the index; pass --from-db to seed the
+trips table and load the index the way the app does at startup.
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from benchmarks import common
+
+from sqlalchemy import select
+from app import db, matching, models
+
+Row = namedtuple("Row", "travel_date id user_id origin destination")
+
+
+def synthetic_trips(total, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    for trip_id in range(1, total + 1):
+        origin, destination = rng.sample(common.CITIES, 2)
+        yield Row(start + timedelta(minutes=rng.randrange(0, 60 * 24 * 365)), trip_id, 1, origin, destination)
+
+
+def random_queries(n, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    queries = []
+    for _ in range(n):
+        origin, destination = rng.sample(common.CITIES, 2)
+        date_from = start + timedelta(days=rng.randrange(0, 350))
+        queries.append((origin.lower(), destination, date_from, date_from + timedelta(days=14)))
+    return queries
+
+
+def run_paced(index, queries, qps, seconds):
+    """Issue queries on a fixed schedule and measure latency from the scheduled start."""
+    interval = 1 / qps
+    samples = []
+    begin = time.perf_counter()
+    for n in range(int(qps * seconds)):
+        scheduled = begin + n * interval
+        while time.perf_counter() < scheduled:
+            pass
+        index.match(*queries[n % len(queries)], limit=20)
+        samples.append((time.perf_counter() - scheduled) * 1000)
+    elapsed = time.perf_counter() - begin
+    return {"target_qps": qps, "achieved_qps": round(len(samples) / elapsed), **common.percentiles(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trips", type=int, default=1_000_000)
+    parser.add_argument("--qps", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--db-repeat", type=int, default=200)
+    parser.add_argument("--from-db", action="store_true")
+    args = parser.parse_args()
+
+    queries = random_queries(10_000)
+    index = matching.RouteIndex()
+    if args.from_db:
+        common.create_schema()
+        common.seed_trips(args.trips)
+
+    # tracemalloc would slow the build ~10x and its hooks stall the paced run
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if args.from_db:
+        asyncio.run(index.load())
+    else:
+        index.add_many(synthetic_trips(args.trips))
+    build_s = time.perf_counter() - start
+    memory_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+
+    max_qps_start = time.perf_counter()
+    for query in queries:
+        index.match(*query, limit=20)
+    unpaced_us = (time.perf_counter() - max_qps_start) / len(queries) * 1e6
+
+    results = {
+        "trips_indexed": len(index),
+        "routes": len(index.routes),
+        "build_s": round(build_s, 2),
+        "peak_rss_growth_mb": round(memory_mb, 1),
+        "match_mean_us": round(unpaced_us, 2),
+        "paced": run_paced(index, queries, args.qps, args.seconds),
+    }
+
+    if args.from_db:
+        # The query /trips/match would otherwise run per request
+        session = db.SessionLocal()
+        origin, destination, date_from, date_to = queries[0]
+        stmt = (
+            select(models.Trip)
+            .where(
+                models.Trip.origin == origin.title(),
+                models.Trip.destination == destination,
+                models.Trip.travel_date.between(date_from, date_to),
+            )
+            .order_by(models.Trip.travel_date, models.Trip.id)
+            .limit(20)
+        )
+        results["db_route_query"] = common.time_calls(lambda: session.scalars(stmt).all(), args.db_repeat)
+        session.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
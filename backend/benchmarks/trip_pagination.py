@@ -0,0 +1,72 @@
+"""Compare the old unpaginated GET /trips with keyset pages.
+
+    python -m benchmarks.trip_pagination --trips 1000000
+"""
+import argparse
+import json
+
+from benchmarks import common
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app import db, models, schemas
+from app.main import app
+
+
+# What GET /trips did before pagination: load and serialize every row.
+legacy_app = FastAPI()
+
+
+def legacy_db():
+    session = db.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@legacy_app.get("/trips", response_model=list[schemas.TripResponse])
+def legacy_list_trips(session: Session = Depends(legacy_db)):
+    return session.query(models.Trip).all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trips", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--legacy-repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    common.create_schema()
+    common.seed_trips(args.trips)
+
+    client = TestClient(app)
+    legacy = TestClient(legacy_app)
+
+    # Cursor from deep inside the table, to show later pages cost the same
+    deep_cursor = None
+    for _ in range(20):
+        page = client.get("/trips", params={"limit": 200, "cursor": deep_cursor}).json()
+        deep_cursor = page["next_cursor"]
+
+    route = dict(origin=common.CITIES[0], destination=common.CITIES[1])
+    results = {
+        "trips": args.trips,
+        "legacy_full_list": common.time_calls(lambda: legacy.get("/trips"), args.legacy_repeat),
+        "first_page": common.time_calls(
+            lambda: client.get("/trips", params={"limit": args.limit}), args.repeat
+        ),
+        "deep_page": common.time_calls(
+            lambda: client.get("/trips", params={"limit": args.limit, "cursor": deep_cursor}), args.repeat
+        ),
+        "filtered_page": common.time_calls(
+            lambda: client.get("/trips", params={"limit": args.limit, **route}), args.repeat
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
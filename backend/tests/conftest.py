@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# The app reads its settings at import time, so they go in before anything imports it.
+# Every route call is checked against its querycount.budget.
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{tempfile.mkdtemp(prefix='backend-tests-')}/test.db",
+    "QUERY_BUDGET_ENFORCE": "1",
+    "BCRYPT_ROUNDS": "4",
+    "ADMIN_USERNAMES": "admin",
+    "RATE_LIMIT_ENABLED": "0",
+    # Tests run the job queue and deliver payment webhooks themselves
+    "JOB_WORKER_IN_APP": "0",
+    "PAYMENT_SIMULATOR_DELAY": "86400",
+})
+for name in ("ASYNC_DATABASE_URL", "DATABASE_REPLICA_URLS", "REALTIME_BROKER", "RATE_LIMIT_BACKEND"):
+    os.environ.pop(name, None)
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+
+PASSWORD = "pw"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    command.upgrade(config, "head")
+
+
+@pytest.fixture(scope="module")
+def client(database):
+    from app import db
+    from app.main import app
+
+    # Each TestClient runs its own event loop; start from fresh connections
+    db.async_engine.sync_engine.dispose(close=False)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(client):
+    """Sign up and log in a new user: {"id", "username", "headers"}."""
+    def make(username=None):
+        username = username or f"user_{uuid.uuid4().hex[:10]}"
+        response = client.post(
+            "/signup", json={"username": username, "email": f"{username}@example.com", "password": PASSWORD}
+        )
+        # 400: a fixed name such as "admin" signed up in an earlier module
+        assert response.status_code in (200, 400), response.text
+        token = client.post("/login", json={"username": username, "password": PASSWORD}).json()["access_token"]
+        return {
+            "id": response.json().get("id"),
+            "username": username,
+            "headers": {"Authorization": f"Bearer {token}"},
+        }
+    return make
+
+
+@pytest.fixture
+def make_request(client, make_user):
+    """A trip by a new traveler and a pending request on it by a new requester."""
+    def make():
+        traveler, requester = make_user(), make_user()
+        trip = client.post(
+            "/trips",
+            json={"origin": "Delhi", "destination": "Dubai", "travel_date": "2030-01-01T10:00:00"},
+            headers=traveler["headers"],
+        ).json()
+        request = client.post(
+            "/requests", json={"product_name": "phone", "trip_id": trip["id"]}, headers=requester["headers"]
+        ).json()
+        return {"traveler": traveler, "requester": requester, "trip": trip, "request": request}
+    return make
+
+
+@pytest.fixture
+def run_jobs(client):
+    """Relay the outbox and run due jobs until both are drained."""
+    from app import jobs, outbox
+
+    async def drain():
+        while await outbox.relay() + await jobs.run_pending():
+            pass
+
+    return lambda: client.portal.call(drain)
+
+
+@pytest.fixture
+def deliver_webhook(client, run_jobs):
+    """Report a payment outcome the way the provider does, then apply it."""
+    from app.providers import provider
+
+    def deliver(reference, outcome="succeeded"):
+        body = json.dumps({"id": f"evt_{uuid.uuid4().hex}", "type": f"payment.{outcome}", "reference": reference}).encode()
+        response = client.post("/payments/webhook", content=body, headers={"X-Signature": provider.sign(body)})
+        assert response.status_code == 202, response.text
+        run_jobs()
+        return response
+    return deliver
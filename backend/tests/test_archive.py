@@ -0,0 +1,167 @@
+from datetime import timedelta
+import pytest
+from sqlalchemy import func, select
+from app import archive, db, jobs, models
+
+
+def archive_conversation(client, request_id):
+    async def run():
+        async with db.AsyncSessionLocal() as session:
+            await archive.archive_conversation(session, request_id)
+            await session.commit()
+    client.portal.call(run)
+
+
+def stored(client, request_id):
+    """(hot message count, archived message count) for a request."""
+    async def run():
+        async with db.AsyncSessionLocal() as session:
+            hot = await session.scalar(
+                select(func.count()).select_from(models.Message).where(models.Message.request_id == request_id)
+            )
+            archived = await session.scalar(
+                select(models.MessageArchive.message_count).where(models.MessageArchive.request_id == request_id)
+            )
+            return hot, archived or 0
+    return client.portal.call(run)
+
+
+def send(client, deal, count, prefix="m"):
+    request_id = deal["request"]["id"]
+    return [
+        client.post(
+            "/messages", json={"request_id": request_id, "content": f"{prefix}{i}"},
+            headers=deal["requester"]["headers"] if i % 2 else deal["traveler"]["headers"],
+        ).json()["id"]
+        for i in range(count)
+    ]
+
+
+def read_all(client, deal, limit):
+    """Every message id, walking the conversation forwards `limit` at a time."""
+    url, headers = f"/messages/{deal['request']['id']}", deal["requester"]["headers"]
+    ids, params = [], {"limit": limit}
+    while True:
+        page = client.get(url, params=params, headers=headers).json()
+        ids += [m["id"] for m in page["items"]]
+        if not page["has_more"]:
+            return ids
+        params["since"] = page["next_cursor"]
+
+
+@pytest.fixture
+def archive_now(monkeypatch):
+    """Archive closed conversations as soon as the job queue runs."""
+    monkeypatch.setattr(archive, "ARCHIVE_AFTER", timedelta(0))
+
+
+def test_message_ids_are_not_reused_after_archiving(client, make_request):
+    deal = make_request()
+    sent = send(client, deal, 2)
+    # Leaves messages empty, as it is once every closed conversation is archived
+    archive_conversation(client, deal["request"]["id"])
+
+    [later] = send(client, deal, 1, prefix="late")
+    assert later > max(sent)
+    assert sorted(read_all(client, deal, limit=100)) == sorted([*sent, later])
+
+
+# -----------------------------
+# Reading archived conversations
+# -----------------------------
+def test_pages_merge_archived_and_hot_messages(client, make_request):
+    deal = make_request()
+    archived = send(client, deal, 5)
+    archive_conversation(client, deal["request"]["id"])
+    hot = send(client, deal, 4, prefix="late")
+    assert stored(client, deal["request"]["id"]) == (4, 5)
+
+    assert read_all(client, deal, limit=3) == archived + hot
+    assert read_all(client, deal, limit=5) == archived + hot
+
+    # Backwards from the newest message, with `before`
+    url, headers = f"/messages/{deal['request']['id']}", deal["requester"]["headers"]
+    newest = client.get(url, headers=headers).json()["next_cursor"]
+    page = client.get(url, params={"before": newest, "limit": 4}, headers=headers).json()
+    assert [m["id"] for m in page["items"]] == (archived + hot)[-5:-1]
+    assert page["has_more"]
+    page = client.get(url, params={"before": page["prev_cursor"], "limit": 4}, headers=headers).json()
+    assert [m["id"] for m in page["items"]] == archived[:4]
+    assert page["has_more"] is False
+
+
+def test_etag_changes_when_conversation_is_archived(client, make_request):
+    deal = make_request()
+    send(client, deal, 3)
+    url, headers = f"/messages/{deal['request']['id']}", deal["requester"]["headers"]
+    first = client.get(url, headers=headers)
+    etag = first.headers["ETag"]
+    assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    archive_conversation(client, deal["request"]["id"])
+    after = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+    assert after.json()["items"] == first.json()["items"]
+
+
+# -----------------------------
+# Scheduling
+# -----------------------------
+def test_rejecting_a_request_archives_its_conversation(client, make_request, run_jobs, archive_now):
+    deal = make_request()
+    sent = send(client, deal, 3)
+    client.put(f"/requests/{deal['request']['id']}/reject", headers=deal["traveler"]["headers"])
+    # request.rejected -> schedule_archive -> messages.archive
+    run_jobs()
+    assert stored(client, deal["request"]["id"]) == (0, 3)
+    assert read_all(client, deal, limit=100) == sent
+
+
+def test_released_escrow_archives_its_conversation(client, make_request, run_jobs, deliver_webhook, archive_now):
+    deal = make_request()
+    client.put(f"/requests/{deal['request']['id']}/accept", headers=deal["traveler"]["headers"])
+    send(client, deal, 2)
+    escrow = client.post(
+        "/payments/create", headers=deal["requester"]["headers"],
+        json={"request_id": deal["request"]["id"], "amount_inr": 100},
+    ).json()
+    run_jobs()
+    deliver_webhook(escrow["provider_payment_id"])
+    # Paid but not released: still open
+    assert stored(client, deal["request"]["id"]) == (2, 0)
+
+    client.put(f"/payments/{escrow['id']}/release", headers=deal["traveler"]["headers"])
+    run_jobs()
+    assert stored(client, deal["request"]["id"]) == (0, 2)
+
+
+def test_stragglers_join_the_existing_archive(client, make_request, run_jobs, archive_now):
+    deal = make_request()
+    early = send(client, deal, 3)
+    client.put(f"/requests/{deal['request']['id']}/reject", headers=deal["traveler"]["headers"])
+    run_jobs()
+    late = send(client, deal, 2, prefix="late")
+    assert stored(client, deal["request"]["id"]) == (2, 3)
+
+    # backfill finds closed requests with quiet hot messages and queues them again
+    assert client.portal.call(archive.backfill) >= 1
+    run_jobs()
+    assert stored(client, deal["request"]["id"]) == (0, 5)
+    assert read_all(client, deal, limit=2) == early + late
+
+
+def test_open_conversations_are_not_archived(client, make_request, run_jobs):
+    deal = make_request()
+    client.put(f"/requests/{deal['request']['id']}/accept", headers=deal["traveler"]["headers"])
+    send(client, deal, 2)
+
+    async def queue_archive():
+        async with db.AsyncSessionLocal() as session:
+            jobs.enqueue(session, "messages.archive", {"request_id": deal["request"]["id"]})
+            await session.commit()
+
+    client.portal.call(queue_archive)
+    run_jobs()
+    # The job ran, but is_closed() turned it away
+    assert stored(client, deal["request"]["id"]) == (2, 0)
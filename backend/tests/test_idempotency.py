@@ -0,0 +1,66 @@
+import uuid
+from datetime import timedelta
+from app import idempotency
+
+
+def key():
+    return {"Idempotency-Key": uuid.uuid4().hex}
+
+
+def accepted(client, make_request):
+    deal = make_request()
+    client.put(f"/requests/{deal['request']['id']}/accept", headers=deal["traveler"]["headers"])
+    return deal
+
+
+def create_payment(client, deal, amount=250, **headers):
+    return client.post(
+        "/payments/create", headers={**deal["requester"]["headers"], **headers},
+        json={"request_id": deal["request"]["id"], "amount_inr": amount},
+    )
+
+
+def test_payment_retry_creates_one_escrow(client, make_request):
+    deal = accepted(client, make_request)
+    headers = key()
+    first = create_payment(client, deal, **headers)
+    replay = create_payment(client, deal, **headers)
+    assert first.status_code == replay.status_code == 200
+    assert replay.json() == first.json()
+    assert replay.headers.get("Idempotent-Replayed") == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+
+def test_second_active_payment_conflicts(client, make_request):
+    deal = accepted(client, make_request)
+    assert create_payment(client, deal).status_code == 200
+    assert create_payment(client, deal, **key()).status_code == 409
+
+
+def test_keys_are_scoped_per_user(client, make_request):
+    shared = key()
+    escrows = []
+    for deal in (accepted(client, make_request), accepted(client, make_request)):
+        response = create_payment(client, deal, amount=100, **shared)
+        assert response.status_code == 200
+        assert "Idempotent-Replayed" not in response.headers
+        escrows.append(response.json())
+    assert escrows[0]["id"] != escrows[1]["id"]
+
+
+def test_expired_key_runs_again(client, make_request, monkeypatch):
+    deal = accepted(client, make_request)
+    headers = key()
+    monkeypatch.setattr(idempotency, "KEY_TTL", timedelta(seconds=-1))
+    assert create_payment(client, deal, **headers).status_code == 200
+    # The stored response has expired, so the retry is a new attempt and hits the active escrow
+    response = create_payment(client, deal, **headers)
+    assert response.status_code == 409
+
+
+def test_sweeper_purges_expired_keys_in_batches(client, make_request, monkeypatch):
+    monkeypatch.setattr(idempotency, "KEY_TTL", timedelta(seconds=-1))
+    for _ in range(3):
+        create_payment(client, accepted(client, make_request), **key())
+    assert client.portal.call(idempotency.purge_expired, 2) >= 3
+    assert client.portal.call(idempotency.purge_expired) == 0
@@ -0,0 +1,18 @@
+import os
+import sqlalchemy as sa
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from app import models
+from app.archive import PARTITION_NAME
+
+
+def include_name(name, type_, parent_names):
+    return not (type_ == "table" and PARTITION_NAME.match(name))
+
+
+def test_migrated_schema_matches_models(database):
+    engine = sa.create_engine(os.environ["DATABASE_URL"])
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={"include_name": include_name})
+        assert compare_metadata(context, models.Base.metadata) == []
+    engine.dispose()
@@ -0,0 +1,121 @@
+import json
+import pytest
+from sqlalchemy import func, select
+from app import db, jobs, models, outbox
+
+
+@pytest.fixture
+def subscribers(monkeypatch):
+    """Subscribers registered in a test are gone after it."""
+    monkeypatch.setattr(outbox, "SUBSCRIBERS", {topic: list(subs) for topic, subs in outbox.SUBSCRIBERS.items()})
+    monkeypatch.setattr(jobs, "HANDLERS", dict(jobs.HANDLERS))
+    # Retry failed jobs straight away instead of after a backoff
+    monkeypatch.setattr(jobs, "backoff", lambda attempts: 0)
+
+
+def query(client, stmt):
+    async def run():
+        async with db.AsyncSessionLocal() as session:
+            return (await session.execute(stmt)).all()
+    return client.portal.call(run)
+
+
+def pending_events(client, request_id):
+    rows = query(client, select(models.OutboxEvent.topic, models.OutboxEvent.payload))
+    return [topic for topic, payload in rows if json.loads(payload).get("request_id") == request_id]
+
+
+def subscriber_jobs(client, kind):
+    return query(client, select(models.Job).where(models.Job.kind == kind))
+
+
+def accept(client, deal):
+    return client.put(f"/requests/{deal['request']['id']}/accept", headers=deal["traveler"]["headers"])
+
+
+def test_event_commits_with_the_transition(client, make_request):
+    deal = make_request()
+    accept(client, deal)
+    assert pending_events(client, deal["request"]["id"]) == ["request.accepted"]
+    # The rejected transition rolls back, and its event with it
+    client.put(f"/requests/{deal['request']['id']}/reject", headers=deal["traveler"]["headers"])
+    assert pending_events(client, deal["request"]["id"]) == ["request.accepted"]
+
+
+def test_rolled_back_event_is_never_relayed(client, subscribers, run_jobs):
+    seen = []
+
+    @outbox.subscriber("test.rollback")
+    async def record(session, event):
+        seen.append(event)
+
+    async def emit_and_roll_back():
+        async with db.AsyncSessionLocal() as session:
+            outbox.emit(session, "test.rollback", {"n": 1})
+            await session.flush()
+            await session.rollback()
+
+    client.portal.call(emit_and_roll_back)
+    run_jobs()
+    assert seen == []
+
+
+def test_relay_fans_out_one_job_per_subscriber(client, make_request, subscribers, run_jobs):
+    calls = []
+
+    @outbox.subscriber("request.accepted")
+    async def first(session, event):
+        calls.append(("first", event["payload"]["request_id"]))
+
+    @outbox.subscriber("request.accepted")
+    async def second(session, event):
+        calls.append(("second", event["payload"]["request_id"]))
+
+    @outbox.subscriber("*")
+    async def everything(session, event):
+        calls.append(("everything", event["topic"]))
+
+    deal = make_request()
+    run_jobs()
+    calls.clear()
+    accept(client, deal)
+    run_jobs()
+
+    request_id = deal["request"]["id"]
+    assert sorted(calls) == [("everything", "request.accepted"), ("first", request_id), ("second", request_id)]
+    assert pending_events(client, request_id) == []
+
+
+def test_failing_subscriber_is_retried_then_dead_lettered(client, make_request, subscribers, run_jobs):
+    healthy = []
+    flaky_attempts = []
+
+    @outbox.subscriber("request.accepted", max_attempts=3)
+    async def broken(session, event):
+        raise RuntimeError("downstream is down")
+
+    @outbox.subscriber("request.accepted", max_attempts=3)
+    async def flaky(session, event):
+        flaky_attempts.append(event["id"])
+        if len(flaky_attempts) < 2:
+            raise RuntimeError("try again")
+
+    @outbox.subscriber("request.accepted")
+    async def fine(session, event):
+        healthy.append(event["id"])
+
+    accept(client, make_request())
+    run_jobs()
+
+    [(dead,)] = subscriber_jobs(client, f"outbox:{__name__}.{broken.__qualname__}")
+    assert dead.status == models.JobStatus.failed
+    assert dead.attempts == dead.max_attempts == 3
+    assert dead.last_error == "RuntimeError: downstream is down"
+
+    [(retried,)] = subscriber_jobs(client, f"outbox:{__name__}.{flaky.__qualname__}")
+    assert retried.status == models.JobStatus.done
+    assert retried.attempts == 2
+
+    # One subscriber failing does not hold the others back
+    assert len(healthy) == 1
+    assert query(client, select(func.count()).select_from(models.OutboxEvent))[0][0] == 0
@@ -0,0 +1,104 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from app import db, models, querycount
+from app.main import app
+
+
+def api_routes():
+    return {(method, route.path) for route in app.routes if isinstance(route, APIRoute) for method in route.methods}
+
+
+def test_enforcement_is_on():
+    assert querycount.ENFORCE
+
+
+def test_every_route_declares_a_budget():
+    missing = [route.path for route in app.routes if isinstance(route, APIRoute) and not hasattr(route.endpoint, "query_budget")]
+    assert missing == []
+
+
+def test_going_over_budget_fails():
+    probe = FastAPI()
+    probe.add_middleware(querycount.QueryBudgetMiddleware)
+
+    @probe.get("/two-queries")
+    @querycount.budget(1)
+    async def two_queries(session=Depends(db.get_db)):
+        await session.scalar(select(models.User.id).limit(1))
+        await session.scalar(select(models.Trip.id).limit(1))
+        return {}
+
+    db.async_engine.sync_engine.dispose(close=False)
+    with TestClient(probe) as probe_client, pytest.raises(querycount.QueryBudgetExceeded):
+        probe_client.get("/two-queries")
+
+
+def test_every_route_stays_within_budget(client, make_user, make_request, run_jobs, deliver_webhook):
+    """Call each route once; a route over its budget raises QueryBudgetExceeded here."""
+    seen = set()
+
+    def call(method, path, expected=200, path_params=None, **kwargs):
+        url = path.format(**path_params) if path_params else path
+        response = client.request(method, url, **kwargs)
+        assert response.status_code == expected, (method, url, response.text)
+        seen.add((method, path))
+        return response
+
+    for path in ("/ping", "/db/pool", "/metrics", "/cache/stats"):
+        call("GET", path)
+
+    call("POST", "/signup", json={"username": "budget_user", "email": "budget@example.com", "password": "pw"})
+    call("POST", "/login", json={"username": "budget_user", "password": "pw"})
+
+    deal = make_request()
+    traveler, requester = deal["traveler"]["headers"], deal["requester"]["headers"]
+    trip_id, request_id = deal["trip"]["id"], deal["request"]["id"]
+    call("POST", "/trips", headers=traveler,
+         json={"origin": "Delhi", "destination": "Dubai", "travel_date": "2030-02-01T10:00:00"})
+    call("POST", "/trips/bulk", headers=traveler,
+         json={"items": [{"origin": "Pune", "destination": "Oslo", "travel_date": "2030-03-01T10:00:00"}]})
+    call("GET", "/trips", params={"origin": "Delhi", "date_from": "2029-01-01T00:00:00"})
+    call("GET", "/trips/match", params={"origin": "Delhi", "destination": "Dubai"})
+    call("GET", "/trips/{trip_id}", path_params={"trip_id": trip_id})
+
+    call("POST", "/requests", headers=requester, json={"product_name": "laptop", "trip_id": trip_id})
+    call("POST", "/requests/bulk", headers=requester, json={"items": [{"product_name": "watch", "trip_id": trip_id}]})
+    call("GET", "/requests/{trip_id}", path_params={"trip_id": trip_id})
+
+    call("POST", "/messages", headers=requester, json={"request_id": request_id, "content": "hi"})
+    call("GET", "/messages/{request_id}", path_params={"request_id": request_id}, headers=traveler)
+    call("PUT", "/messages/{request_id}/read", path_params={"request_id": request_id}, headers=traveler)
+    call("GET", "/me/dashboard", headers=traveler)
+
+    call("PUT", "/requests/{request_id}/accept", path_params={"request_id": request_id}, headers=traveler)
+    escrow = call("POST", "/payments/create", headers=requester, json={"request_id": request_id, "amount_inr": 10}).json()
+    run_jobs()
+    deliver_webhook(escrow["provider_payment_id"])
+    seen.add(("POST", "/payments/webhook"))
+    call("PUT", "/payments/{escrow_id}/release", path_params={"escrow_id": escrow["id"]}, headers=traveler)
+
+    # Fresh deals for the paths the first one closed off
+    other = make_request()
+    call("PUT", "/requests/{request_id}/reject", path_params={"request_id": other["request"]["id"]},
+         headers=other["traveler"]["headers"])
+    other = make_request()
+    client.put(f"/requests/{other['request']['id']}/accept", headers=other["traveler"]["headers"])
+    escrow = client.post(
+        "/payments/create", headers=other["requester"]["headers"],
+        json={"request_id": other["request"]["id"], "amount_inr": 10},
+    ).json()
+    run_jobs()
+    deliver_webhook(escrow["provider_payment_id"])
+    call("PUT", "/payments/{escrow_id}/refund", path_params={"escrow_id": escrow["id"]},
+         headers=other["requester"]["headers"])
+
+    admin = make_user("admin")["headers"]
+    for kind in ("trips", "requests", "escrows"):
+        call("GET", f"/admin/export/{kind}", headers=admin)
+    call("GET", "/search/trips", params={"q": "Delhi"})
+    call("GET", "/search/requests", params={"q": "phone"})
+
+    assert api_routes() - seen == set()
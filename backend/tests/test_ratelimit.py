@@ -0,0 +1,42 @@
+import asyncio
+import time
+from app.ratelimit import InMemoryRateLimitBackend
+
+
+def test_eviction_keeps_live_buckets_once_expired_ones_free_room():
+    backend = InMemoryRateLimitBackend(maxsize=10)
+    now = time.monotonic()
+    backend._tat.update({f"idle{i}": now - 60 for i in range(3)})
+    backend._tat.update({f"hot{i}": now + 60 for i in range(7)})
+
+    assert asyncio.run(backend.take("new", interval=1.0, burst=5)) == 0.0
+    assert set(backend._tat) == {f"hot{i}" for i in range(7)} | {"new"}
+
+
+def test_eviction_drops_least_recently_used_bucket_when_still_full():
+    backend = InMemoryRateLimitBackend(maxsize=3)
+    now = time.monotonic()
+    backend._tat.update({f"hot{i}": now + 60 for i in range(3)})
+
+    asyncio.run(backend.take("new", interval=1.0, burst=5))
+    assert list(backend._tat) == ["hot1", "hot2", "new"]
+
+
+def test_recently_used_buckets_survive_eviction():
+    backend = InMemoryRateLimitBackend(maxsize=3)
+    for key in ("a", "b", "c"):
+        asyncio.run(backend.take(key, interval=60.0, burst=5))
+    # "a" is the oldest key but was just used again
+    asyncio.run(backend.take("a", interval=60.0, burst=5))
+
+    asyncio.run(backend.take("new", interval=60.0, burst=5))
+    assert list(backend._tat) == ["c", "a", "new"]
+
+
+def test_expired_buckets_are_purged_a_few_per_check():
+    backend = InMemoryRateLimitBackend(maxsize=100)
+    backend._tat.update({f"idle{i}": time.monotonic() - 60 for i in range(20)})
+
+    asyncio.run(backend.take("new", interval=1.0, burst=5))
+    assert len(backend._tat) == 20 - backend.PURGE_BATCH + 1
+    assert "idle0" not in backend._tat
@@ -0,0 +1,150 @@
+import asyncio
+import asyncpg
+import pytest
+from starlette.websockets import WebSocketDisconnect
+from app import realtime
+
+
+def token(user):
+    return user["headers"]["Authorization"].removeprefix("Bearer ")
+
+
+# -----------------------------
+# /ws/messages
+# -----------------------------
+def test_posted_message_is_pushed_to_both_parties(client, make_request):
+    deal = make_request()
+    traveler, requester = deal["traveler"], deal["requester"]
+    assert isinstance(realtime.broker, realtime.InMemoryBroker)
+
+    with client.websocket_connect(f"/ws/messages?token={token(traveler)}") as traveler_socket, \
+            client.websocket_connect(f"/ws/messages?token={token(requester)}") as requester_socket:
+        sent = client.post(
+            "/messages", json={"request_id": deal["request"]["id"], "content": "on my way"},
+            headers=requester["headers"],
+        ).json()
+        for socket in (traveler_socket, requester_socket):
+            pushed = socket.receive_json()
+            assert pushed["id"] == sent["id"]
+            assert pushed["content"] == "on my way"
+
+
+def test_socket_needs_a_valid_token(client):
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/ws/messages?token=not-a-token") as socket:
+            socket.receive_json()
+    assert closed.value.code == 1008
+
+
+# -----------------------------
+# ConnectionHub
+# -----------------------------
+def test_hub_delivers_to_recipients_only():
+    async def run():
+        hub = realtime.ConnectionHub()
+        alice, bob, carol = hub.connect(1), hub.connect(2), hub.connect(3)
+        hub.deliver({"recipients": [1, 2], "message": {"id": 7}})
+        return alice.get_nowait(), bob.get_nowait(), carol.empty()
+
+    assert asyncio.run(run()) == ({"id": 7}, {"id": 7}, True)
+
+
+def test_hub_closes_slow_consumers(monkeypatch):
+    monkeypatch.setattr(realtime, "CONNECTION_QUEUE_SIZE", 2)
+
+    async def run():
+        hub = realtime.ConnectionHub()
+        queue = hub.connect(1)
+        for message_id in range(3):
+            hub.deliver({"recipients": [1], "message": {"id": message_id}})
+        # The backlog is dropped and replaced by the close marker
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    assert asyncio.run(run()) == [None]
+
+
+def test_hub_forgets_disconnected_sockets():
+    async def run():
+        hub = realtime.ConnectionHub()
+        queue = hub.connect(1)
+        hub.disconnect(1, queue)
+        hub.deliver({"recipients": [1], "message": {"id": 1}})
+        return dict(hub.connections)
+
+    assert asyncio.run(run()) == {}
+
+
+# -----------------------------
+# PostgresBroker
+# -----------------------------
+class FakeConnection:
+    def __init__(self, error=None):
+        self.error = error
+        self.terminated = False
+
+    def is_closed(self):
+        return self.terminated
+
+    def terminate(self):
+        self.terminated = True
+
+    async def execute(self, *args):
+        if self.error:
+            raise self.error
+
+
+EVENT = {"recipients": [1, 2], "message": {"id": 1}}
+
+
+def test_publish_gives_up_on_a_slow_connect(monkeypatch):
+    async def never_connects(dsn):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(asyncpg, "connect", never_connects)
+    monkeypatch.setattr(realtime, "CONNECT_TIMEOUT", 0.05)
+
+    async def run():
+        broker = realtime.PostgresBroker("postgresql://unused")
+        await asyncio.wait_for(broker.publish(EVENT), 1)
+        return broker._publisher
+
+    assert asyncio.run(run()) is None
+
+
+def test_failed_publish_closes_the_broken_connection(monkeypatch):
+    broken = FakeConnection(error=asyncpg.InterfaceError("another operation is in progress"))
+
+    async def connect(dsn):
+        return broken
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+
+    async def run():
+        broker = realtime.PostgresBroker("postgresql://unused")
+        await broker.publish(EVENT)
+        return broker._publisher
+
+    assert asyncio.run(run()) is None
+    assert broken.terminated
+
+
+def test_stop_closes_the_listener_connection(monkeypatch):
+    listener = FakeConnection()
+
+    async def add_listener(channel, callback):
+        pass
+
+    async def connect(dsn):
+        return listener
+
+    listener.add_listener = add_listener
+    monkeypatch.setattr(asyncpg, "connect", connect)
+
+    async def run():
+        broker = realtime.PostgresBroker("postgresql://unused")
+        await broker.start()
+        await asyncio.sleep(0.01)
+        await broker.stop()
+
+    asyncio.run(run())
+    assert listener.terminated
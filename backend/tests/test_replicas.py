@@ -0,0 +1,29 @@
+from app import cache, db, replicas
+
+
+def use_replica(monkeypatch):
+    """Route reads to a "replica" that is really the primary engine."""
+    monkeypatch.setattr(replicas.replica_set, "replicas", [replicas.Replica(db.ASYNC_DATABASE_URL, db.async_engine)])
+
+
+def cached(client, key):
+    return client.portal.call(cache.response_cache.get, key)
+
+
+def test_replica_reads_do_not_fill_the_cache(client, make_request, monkeypatch):
+    trip_id = make_request()["trip"]["id"]
+    # After the setup writes, which would have pinned this client to the primary
+    use_replica(monkeypatch)
+
+    assert client.get(f"/trips/{trip_id}").status_code == 200
+    assert client.get(f"/requests/{trip_id}").status_code == 200
+    assert cached(client, cache.trip_key(trip_id)) is None
+    assert cached(client, cache.trip_requests_key(trip_id)) is None
+
+
+def test_primary_reads_fill_the_cache(client, make_request):
+    trip_id = make_request()["trip"]["id"]
+    assert client.get(f"/trips/{trip_id}").status_code == 200
+    assert client.get(f"/requests/{trip_id}").status_code == 200
+    assert cached(client, cache.trip_key(trip_id)) is not None
+    assert cached(client, cache.trip_requests_key(trip_id)) is not None
@@ -0,0 +1,185 @@
+import pytest
+from sqlalchemy import select
+from app import db, models
+
+
+def answer(client, deal, action, **headers):
+    """The traveler accepts or rejects the deal's request."""
+    return client.put(
+        f"/requests/{deal['request']['id']}/{action}", headers={**deal["traveler"]["headers"], **headers}
+    )
+
+
+@pytest.fixture
+def paid_escrow(client, make_request, run_jobs, deliver_webhook):
+    """An accepted request whose payment the provider has confirmed."""
+    def make():
+        deal = make_request()
+        answer(client, deal, "accept")
+        escrow = client.post(
+            "/payments/create", headers=deal["requester"]["headers"],
+            json={"request_id": deal["request"]["id"], "amount_inr": 500},
+        ).json()
+        run_jobs()
+        deliver_webhook(escrow["provider_payment_id"])
+        return deal, escrow
+    return make
+
+
+# -----------------------------
+# Requests
+# -----------------------------
+def test_accept_bumps_version(client, make_request):
+    deal = make_request()
+    response = answer(client, deal, "accept")
+    assert response.status_code == 200
+    assert response.json()["status"] == "accepted"
+    assert response.json()["version"] == deal["request"]["version"] + 1
+
+
+def test_accepting_again_is_a_no_op(client, make_request):
+    deal = make_request()
+    first = answer(client, deal, "accept").json()
+    second = answer(client, deal, "accept")
+    assert second.status_code == 200
+    assert second.json()["version"] == first["version"]
+
+
+def test_cannot_reject_accepted_request(client, make_request):
+    deal = make_request()
+    answer(client, deal, "accept")
+    assert answer(client, deal, "reject").status_code == 409
+
+
+def test_unknown_request_is_404(client, make_user):
+    assert client.put("/requests/999999/accept", headers=make_user()["headers"]).status_code == 404
+
+
+def test_answering_needs_a_login(client, make_request):
+    deal = make_request()
+    assert client.put(f"/requests/{deal['request']['id']}/accept").status_code == 401
+
+
+@pytest.mark.parametrize("who", ["requester", "stranger"])
+def test_only_traveler_answers(client, make_request, make_user, who):
+    deal = make_request()
+    headers = deal["requester"]["headers"] if who == "requester" else make_user()["headers"]
+    for action in ("accept", "reject"):
+        response = client.put(f"/requests/{deal['request']['id']}/{action}", headers=headers)
+        assert response.status_code == 403
+    # Still pending: the traveler can answer
+    assert answer(client, deal, "accept").status_code == 200
+
+
+def test_if_match_guards_against_lost_updates(client, make_request):
+    deal = make_request()
+    version = deal["request"]["version"]
+    assert answer(client, deal, "accept", **{"If-Match": f'"{version + 1}"'}).status_code == 412
+    fresh = answer(client, deal, "reject", **{"If-Match": f'W/"{version}"'})
+    assert fresh.status_code == 200
+    assert fresh.json()["status"] == "rejected"
+
+
+def test_if_match_must_be_a_version(client, make_request):
+    assert answer(client, make_request(), "accept", **{"If-Match": "abc"}).status_code == 400
+
+
+def test_replay_returns_stored_response(client, make_request):
+    deal = make_request()
+    key = {"Idempotency-Key": "accept-replay"}
+    first = answer(client, deal, "accept", **key)
+    replay = answer(client, deal, "accept", **key)
+    assert first.status_code == replay.status_code == 200
+    assert replay.json() == first.json()
+    assert replay.headers.get("Idempotent-Replayed") == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+
+def test_replay_skips_state_machine(client, make_request):
+    deal = make_request()
+    key = {"Idempotency-Key": "accept-then-retry"}
+    answer(client, deal, "accept", **key)
+    # Rejecting is no longer allowed, but a retry of the accept still gets its answer
+    assert answer(client, deal, "reject").status_code == 409
+    assert answer(client, deal, "accept", **key).status_code == 200
+
+
+def test_idempotency_key_does_not_replay_for_another_caller(client, make_request):
+    deal = make_request()
+    key = {"Idempotency-Key": "answer-once"}
+    assert answer(client, deal, "accept", **key).status_code == 200
+    response = client.put(
+        f"/requests/{deal['request']['id']}/accept", headers={**deal["requester"]["headers"], **key}
+    )
+    assert response.status_code == 403
+    assert "Idempotent-Replayed" not in response.headers
+
+
+# -----------------------------
+# Escrows
+# -----------------------------
+def test_payment_needs_accepted_request(client, make_request):
+    deal = make_request()
+    response = client.post(
+        "/payments/create", headers=deal["requester"]["headers"],
+        json={"request_id": deal["request"]["id"], "amount_inr": 500},
+    )
+    assert response.status_code == 403
+
+
+def test_webhook_marks_escrow_paid(client, paid_escrow):
+    deal, escrow = paid_escrow()
+    assert escrow["status"] == "pending"
+    released = client.put(f"/payments/{escrow['id']}/release", headers=deal["traveler"]["headers"])
+    assert released.status_code == 200
+    assert released.json()["status"] == "released"
+
+
+def test_failed_payment_cannot_be_released(client, make_request, run_jobs, deliver_webhook):
+    deal = make_request()
+    answer(client, deal, "accept")
+    escrow = client.post(
+        "/payments/create", headers=deal["requester"]["headers"],
+        json={"request_id": deal["request"]["id"], "amount_inr": 500},
+    ).json()
+    run_jobs()
+    deliver_webhook(escrow["provider_payment_id"], outcome="failed")
+    response = client.put(f"/payments/{escrow['id']}/release", headers=deal["traveler"]["headers"])
+    assert response.status_code == 409
+
+
+def test_conflicting_payment_event_is_not_retried(client, paid_escrow, deliver_webhook):
+    deal, escrow = paid_escrow()
+    deliver_webhook(escrow["provider_payment_id"], outcome="failed")
+
+    async def event_jobs():
+        async with db.AsyncSessionLocal() as session:
+            return (await session.scalars(
+                select(models.Job).where(models.Job.kind == "payment.event").order_by(models.Job.id.desc()).limit(1)
+            )).all()
+
+    [job] = client.portal.call(event_jobs)
+    assert job.status == models.JobStatus.done
+    assert job.attempts == 1
+    # The escrow stays paid
+    released = client.put(f"/payments/{escrow['id']}/release", headers=deal["traveler"]["headers"])
+    assert released.status_code == 200
+
+
+def test_only_traveler_releases(client, paid_escrow):
+    deal, escrow = paid_escrow()
+    response = client.put(f"/payments/{escrow['id']}/release", headers=deal["requester"]["headers"])
+    assert response.status_code == 403
+
+
+def test_only_requester_refunds(client, paid_escrow):
+    deal, escrow = paid_escrow()
+    response = client.put(f"/payments/{escrow['id']}/refund", headers=deal["traveler"]["headers"])
+    assert response.status_code == 403
+
+
+def test_released_escrow_cannot_be_refunded(client, paid_escrow):
+    deal, escrow = paid_escrow()
+    client.put(f"/payments/{escrow['id']}/release", headers=deal["traveler"]["headers"])
+    response = client.put(f"/payments/{escrow['id']}/refund", headers=deal["requester"]["headers"])
+    assert response.status_code == 409
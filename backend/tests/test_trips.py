@@ -0,0 +1,52 @@
+import uuid
+
+
+def route():
+    """A route no other test uses, so listings only see this test's trips."""
+    tag = uuid.uuid4().hex[:8]
+    return f"Origin {tag}", f"Destination {tag}"
+
+
+def test_aware_travel_date_is_stored_as_utc(client, make_user):
+    user = make_user()
+    origin, destination = route()
+    for travel_date in ("2031-01-01T10:00:00Z", "2031-01-01T15:30:00+05:30"):
+        response = client.post(
+            "/trips", headers=user["headers"],
+            json={"origin": origin, "destination": destination, "travel_date": travel_date},
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["travel_date"] == "2031-01-01T10:00:00"
+
+
+def test_bulk_trips_accept_aware_dates(client, make_user):
+    origin, destination = route()
+    response = client.post(
+        "/trips/bulk", headers=make_user()["headers"],
+        json={"items": [{"origin": origin, "destination": destination, "travel_date": "2031-02-01T00:00:00-02:00"}]},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["created"][0]["travel_date"] == "2031-02-01T02:00:00"
+
+
+def test_date_filters_accept_aware_bounds(client, make_user):
+    user = make_user()
+    origin, destination = route()
+    for day in ("05", "06", "07"):
+        client.post(
+            "/trips", headers=user["headers"],
+            json={"origin": origin, "destination": destination, "travel_date": f"2031-03-{day}T12:00:00"},
+        )
+    bounds = {"date_from": "2031-03-06T00:00:00Z", "date_to": "2031-03-06T23:59:59+00:00"}
+
+    listed = client.get("/trips", params={"origin": origin, **bounds})
+    assert listed.status_code == 200, listed.text
+    assert [trip["travel_date"] for trip in listed.json()["items"]] == ["2031-03-06T12:00:00"]
+
+    matched = client.get("/trips/match", params={"origin": origin, "destination": destination, **bounds})
+    assert matched.status_code == 200, matched.text
+    assert [trip["travel_date"] for trip in matched.json()] == ["2031-03-06T12:00:00"]
+
+    exported = client.get("/admin/export/trips", params=bounds, headers=make_user("admin")["headers"])
+    assert exported.status_code == 200, exported.text
+    assert origin in exported.text
@@ -1,12 +1,61 @@
-import React, { useContext } from 'react';
+import React, { useContext, useEffect, useState } from 'react';
+import { Link } from 'react-router-dom';
 import { AuthContext } from '../context/AuthContext';
+import api from '../lib/api';
+
+function RequestRow({ r, trip }){
+  return (
+    <li className="flex justify-between items-center p-2 border rounded">
+      <div>
+        <span className="font-semibold">{r.product_name}</span>
+        {trip && <span className="text-sm text-gray-600"> — {trip.origin} → {trip.destination}</span>}
+        <div className="text-xs text-gray-500">
+          {r.status}{r.escrow_status && ` · payment ${r.escrow_status}`}
+        </div>
+      </div>
+      {r.unread_count > 0 && (
+        <span className="text-xs bg-blue-600 text-white rounded-full px-2 py-1">{r.unread_count} new</span>
+      )}
+    </li>
+  );
+}
 
 export default function Dashboard(){
   const { user } = useContext(AuthContext);
+  const [data, setData] = useState(null);
+
+  // One call returns trips, requests, unread counts and payment states
+  useEffect(()=> { api.get('/me/dashboard').then(r=>setData(r.data)).catch(()=>{}); }, []);
+
   return (
     <div className="p-6 max-w-4xl mx-auto">
       <h2 className="text-xl mb-4">Dashboard</h2>
       <p>Welcome {user?.username || 'user'} — this is your dashboard.</p>
+      {!data ? <div className="mt-4">Loading...</div> : (
+        <>
+          <p className="mt-2 text-sm text-gray-600">{data.unread_total} unread messages</p>
+
+          <h3 className="text-lg mt-6 mb-2">Your trips</h3>
+          {data.trips.length === 0 && <p className="text-sm text-gray-600">No trips yet.</p>}
+          <ul className="space-y-4">
+            {data.trips.map(t=>(
+              <li key={t.id} className="p-3 border rounded">
+                <Link to={`/trips/${t.id}`} className="font-semibold">{t.origin} → {t.destination}</Link>
+                <div className="text-sm">{new Date(t.travel_date).toLocaleString()}</div>
+                <ul className="mt-2 space-y-2">
+                  {t.requests.map(r=><RequestRow key={r.id} r={r} />)}
+                </ul>
+              </li>
+            ))}
+          </ul>
+
+          <h3 className="text-lg mt-6 mb-2">Your requests</h3>
+          {data.outgoing_requests.length === 0 && <p className="text-sm text-gray-600">No requests yet.</p>}
+          <ul className="space-y-2">
+            {data.outgoing_requests.map(r=><RequestRow key={r.id} r={r} trip={r.trip} />)}
+          </ul>
+        </>
+      )}
     </div>
   );
 }
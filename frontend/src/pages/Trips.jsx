@@ -4,7 +4,7 @@ import { Link } from 'react-router-dom';
 
 export default function Trips(){
   const [trips, setTrips] = useState([]);
-  useEffect(()=>{ api.get('/trips').then(r=>setTrips(r.data)).catch(()=>{}); }, []);
+  useEffect(()=>{ api.get('/trips').then(r=>setTrips(r.data.items)).catch(()=>{}); }, []);
   return (
     <div className="p-6 max-w-4xl mx-auto">
       <h2 className="text-xl mb-4">Trips</h2>